@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import ConfigurationPanel from './ConfigurationPanel';
 import CourseSelector from './CourseSelector';
 import LogPanel from './LogPanel';
@@ -34,6 +34,8 @@ const CanvasDownloader = () => {
   const [isConnected, setIsConnected] = useState(false);
   const [backendConnected, setBackendConnected] = useState(false);
   const [courseProgress, setCourseProgress] = useState({ current: 0, total: 0, course_name: '' });
+  // Late course counts can arrive before the /courses response is applied
+  const lateCourseCounts = useRef({});
 
 
   // API Configuration
@@ -118,20 +120,36 @@ const CanvasDownloader = () => {
       setProgress(data);
     });
 
-    newSocket.on('download_log', (logEntry) => {
-      logger.debug('Log received from server');
-      // Ensure server logs also use 24-hour format
+    // Ensure server logs also use 24-hour format
+    const normalizeLogEntry = (logEntry) => {
       const newDate = new Date();
       if (logEntry.timestamp) {
         const [hours, minutes, seconds] = logEntry.timestamp.split(':');
         newDate.setHours(hours, minutes, seconds);
       }
 
-      const normalizedLogEntry = {
+      return {
         ...logEntry,
         timestamp: newDate.toLocaleTimeString('en-GB', { hour12: false })
       };
-      setLogs(prev => [...prev, normalizedLogEntry]);
+    };
+
+    newSocket.on('download_log', (logEntry) => {
+      logger.debug('Log received from server');
+      setLogs(prev => [...prev, normalizeLogEntry(logEntry)]);
+    });
+
+    // Download jobs send their logs in batches to avoid a re-render per line
+    newSocket.on('download_log_batch', (batch) => {
+      logger.debug(`Log batch received from server (${batch.entries.length} entries)`);
+      setLogs(prev => [...prev, ...batch.entries.map(normalizeLogEntry)]);
+    });
+
+    newSocket.on('download_status', (data) => {
+      logger.info(`Download status: ${data.status}`);
+      if (['completed', 'stopped', 'error'].includes(data.status)) {
+        setDownloadStatus(data.status === 'stopped' ? 'idle' : data.status);
+      }
     });
 
     newSocket.on('user_authenticated', (data) => {
@@ -141,6 +159,15 @@ const CanvasDownloader = () => {
     });
 
     newSocket.on('course_fetch_progress', (data) => {
+      // Late per-course counts arrive after the course list with a course_id
+      if (data.course_id !== undefined) {
+        logger.debug(`Course counts received for ${data.course_id}`);
+        lateCourseCounts.current[data.course_id] = data;
+        setCourses(prev => prev.map(course => (
+          course.id === data.course_id ? { ...course, ...data } : course
+        )));
+        return;
+      }
       logger.debug(`Course fetch progress: ${data.current}/${data.total}`);
       setCourseProgress(data);
     });
@@ -228,7 +255,10 @@ const CanvasDownloader = () => {
       }
 
       const data = await response.json();
-      setCourses(data.courses);
+      setCourses(data.courses.map(course => (
+        course.counts_pending ? { ...course, ...lateCourseCounts.current[course.id] } : course
+      )));
+      lateCourseCounts.current = {};
       setCurrentUser(data.user);
       sendToLogPanel(`Found ${data.courses.length} courses for ${data.user.name}`, 'success');
       setDownloadStatus('idle');
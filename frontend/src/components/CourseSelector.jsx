@@ -98,11 +98,11 @@ const CourseSelector = ({
                   <div className="flex items-center gap-4 mt-2 text-xs text-gray-500">
                     <span className="flex items-center gap-1">
                       <Folder size={12} />
-                      {course.folder_count} folders
+                      {course.folder_count ?? (course.counts_pending ? '…' : '?')} folders
                     </span>
                     <span className="flex items-center gap-1">
                       <File size={12} />
-                      {course.file_count} files
+                      {course.file_count ?? (course.counts_pending ? '…' : '?')} files
                     </span>
                   </div>
                 </div>
@@ -125,8 +125,10 @@ const CourseSelector = ({
               </div>
             )}
             <div className={`flex items-center justify-between text-sm ${downloadStatus === 'error' ? 'text-red-600' : 'text-gray-600'}`}>
-              <span>Progress: {progress.current}/{progress.total}</span>
-              <span>{Math.round((progress.current / progress.total) * 100)}%</span>
+              <span>
+                Progress: {progress.current}/{progress.discovering ? `at least ${progress.total}, still discovering` : progress.total}
+              </span>
+              <span>{progress.discovering ? '…' : `${Math.round((progress.current / progress.total) * 100)}%`}</span>
             </div>
             <div className="w-full bg-gray-200 rounded-full h-2">
               <div
@@ -1,19 +1,45 @@
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, Response, request, jsonify, redirect
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 from pathvalidate import sanitize_filename
 from canvasapi import Canvas
-from canvasapi.exceptions import Unauthorized, ResourceDoesNotExist, CanvasException
+from canvasapi.exceptions import Unauthorized, ResourceDoesNotExist, Forbidden, CanvasException
+from canvasapi.submission import Submission
 import threading
 import time
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timezone
 import json
 import uuid
+import sqlite3
+import socket
+import shutil
+import copy
+import hashlib
+import zipfile
+import re
+from itertools import count, islice
+import random
+from collections import OrderedDict, deque
+import heapq
+import fnmatch
+import math
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import asyncio
+
+try:
+    import aiohttp  # Optional dependency, only needed for the async download backend
+except ImportError:
+    aiohttp = None
 
 # Configuration
 from dotenv import load_dotenv
@@ -26,6 +52,91 @@ IS_PRODUCTION = FLASK_ENV == 'production'
 API_PORT = int(os.environ.get('API_PORT', 8000))
 API_HOST = os.environ.get('API_HOST', '0.0.0.0')
 
+# Durable job store shared by server processes
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', './canvas_downloader_jobs.sqlite3')
+JOB_STORE_SYNC_INTERVAL = float(os.environ.get('JOB_STORE_SYNC_INTERVAL', 2))
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 60))
+
+# Download concurrency (per job)
+DOWNLOAD_WORKERS = int(os.environ.get('DOWNLOAD_WORKERS', 4))
+MAX_DOWNLOAD_WORKERS = int(os.environ.get('MAX_DOWNLOAD_WORKERS', 16))
+
+# Shared download scheduler (all jobs): total worker threads and per-Canvas-host cap
+GLOBAL_DOWNLOAD_WORKERS = int(os.environ.get('GLOBAL_DOWNLOAD_WORKERS', 32))
+PER_HOST_CONCURRENCY = int(os.environ.get('PER_HOST_CONCURRENCY', 16))
+
+# Download backend: 'threads' (shared worker pool) or 'async' (asyncio + aiohttp on one event loop)
+DOWNLOAD_BACKEND = os.environ.get('DOWNLOAD_BACKEND', 'threads')
+# Concurrent Canvas requests per job on the async backend
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get('ASYNC_MAX_IN_FLIGHT', 64))
+
+# Files a job may have discovered but not yet finished downloading; listing pauses when it is full
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', 256))
+# Order of a job's queued downloads: 'listing' (Canvas order), 'smallest_first' or 'largest_first'
+SCHEDULE_POLICY = os.environ.get('SCHEDULE_POLICY', 'listing')
+
+# Canvas file listing: 'course' pulls every file from the course-level /files endpoint,
+# 'folders' lists each folder separately (also used as fallback when /files is forbidden)
+FILE_LISTING_MODE = os.environ.get('FILE_LISTING_MODE', 'course')
+CANVAS_PER_PAGE = int(os.environ.get('CANVAS_PER_PAGE', 100))
+
+# Streaming chunk size for all downloads (bounds per-transfer memory)
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+
+# Resumable large-file downloads: reconnect attempts before giving up on a file
+LARGE_FILE_RESUME_ATTEMPTS = int(os.environ.get('LARGE_FILE_RESUME_ATTEMPTS', 5))
+
+# Segmented downloads: files at least this large are fetched as parallel byte ranges
+# when the server advertises Accept-Ranges (set segments to 1 to disable)
+SEGMENTED_DOWNLOAD_SEGMENTS = int(os.environ.get('SEGMENTED_DOWNLOAD_SEGMENTS', 4))
+SEGMENTED_DOWNLOAD_MIN_SIZE = int(os.environ.get('SEGMENTED_DOWNLOAD_MIN_SIZE', 100000000))
+
+# Per-client limits (token buckets; RATE_LIMIT_STORAGE_URL=redis://... shares them across processes)
+COURSES_PER_HOUR = int(os.environ.get('COURSES_PER_HOUR', 100))
+FILES_PER_HOUR = int(os.environ.get('FILES_PER_HOUR', 500))
+FILES_PER_DAY = int(os.environ.get('FILES_PER_DAY', 2000))
+FILE_RESERVATION_BATCH = int(os.environ.get('FILE_RESERVATION_BATCH', 10))
+RATE_LIMIT_SWEEP_INTERVAL = int(os.environ.get('RATE_LIMIT_SWEEP_INTERVAL', 600))
+RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL', '')
+
+# Incremental sync: skip files whose Canvas id, size and updated_at match the local manifest
+INCREMENTAL_SYNC = os.environ.get('INCREMENTAL_SYNC', 'true').lower() == 'true'
+
+# Canvas metadata cache shared by /api/courses and download jobs
+METADATA_CACHE_TTL = int(os.environ.get('METADATA_CACHE_TTL', 300))
+METADATA_CACHE_SIZE = int(os.environ.get('METADATA_CACHE_SIZE', 512))
+
+# Course list file counts: computed concurrently, late results are pushed over Socket.IO
+COURSE_STATS_WORKERS = int(os.environ.get('COURSE_STATS_WORKERS', 8))
+COURSE_STATS_TIME_BUDGET = float(os.environ.get('COURSE_STATS_TIME_BUDGET', 5))
+
+# Canvas rate-limit aware throttling (X-Rate-Limit-Remaining)
+RATE_LIMIT_HEALTHY = float(os.environ.get('RATE_LIMIT_HEALTHY', 300))
+RATE_LIMIT_LOW = float(os.environ.get('RATE_LIMIT_LOW', 100))
+RATE_LIMIT_REFILL_RATE = float(os.environ.get('RATE_LIMIT_REFILL_RATE', 10))  # Bucket units Canvas restores per second
+RATE_LIMIT_RETRIES = int(os.environ.get('RATE_LIMIT_RETRIES', 5))
+
+# Log entries kept per job for /status (older entries are evicted)
+LOG_BUFFER_SIZE = int(os.environ.get('LOG_BUFFER_SIZE', 1000))
+
+# Socket.IO event batching: flush interval in seconds and max buffered log entries
+PROGRESS_EMIT_INTERVAL = float(os.environ.get('PROGRESS_EMIT_INTERVAL', 0.25))
+PROGRESS_EMIT_BATCH_SIZE = int(os.environ.get('PROGRESS_EMIT_BATCH_SIZE', 50))
+
+# Content-addressed dedup: keep one blob per content hash and hardlink it into each course path
+DEDUP_MODE = os.environ.get('DEDUP_MODE', 'false').lower() == 'true'
+
+# Filesystem writer: fsync policy ('none', 'batch' = every FSYNC_BATCH_SIZE files and at job end,
+# 'always' = each file and its directory on commit) and opt-in posix_fallocate for files >= PREALLOCATE_MIN_SIZE
+FSYNC_MODE = os.environ.get('FSYNC_MODE', 'none')
+FSYNC_BATCH_SIZE = int(os.environ.get('FSYNC_BATCH_SIZE', 100))
+PREALLOCATE_FILES = os.environ.get('PREALLOCATE_FILES', 'false').lower() == 'true'
+PREALLOCATE_MIN_SIZE = int(os.environ.get('PREALLOCATE_MIN_SIZE', 64 * 1024 * 1024))
+
+# HTTP connection pooling (per job)
+HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 3))
+
 # CORS configuration based on environment
 if IS_PRODUCTION:
     # Production: Use environment variable for allowed origins
@@ -65,7 +176,11 @@ CORS(app, resources={
 })
 
 # Initialize SocketIO with proper CORS settings
-socketio = SocketIO(app, cors_allowed_origins=FRONTEND_URLS, logger=True, engineio_logger=True)
+# (SOCKETIO_MESSAGE_QUEUE lets several server processes emit to each other's clients)
+socketio = SocketIO(
+    app, cors_allowed_origins=FRONTEND_URLS, logger=True, engineio_logger=True,
+    message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+)
 
 # Initialize rate limiter
 limiter = Limiter(
@@ -78,85 +193,453 @@ limiter = Limiter(
 active_downloads = {}
 download_locks = {}
 
+# Metrics (served in Prometheus text format from /api/metrics)
+class MetricsRegistry:
+    """Minimal Prometheus registry: labelled counters, gauges and histograms rendered as text"""
+
+    DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = OrderedDict()  # {name: {'type', 'help', 'buckets', 'values': {labels: value}}}
+
+    def register(self, kind, name, help_text, buckets=None):
+        self.metrics[name] = {'type': kind, 'help': help_text, 'buckets': buckets, 'values': {}}
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            values = self.metrics[name]['values']
+            values[key] = values.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.metrics[name]['values'][tuple(sorted(labels.items()))] = value
+
+    def reset(self, name):
+        with self.lock:
+            self.metrics[name]['values'].clear()
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            metric = self.metrics[name]
+            state = metric['values'].get(key)
+            if state is None:
+                state = metric['values'][key] = {'buckets': [0] * len(metric['buckets']), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(metric['buckets']):
+                if value <= bound:
+                    state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ''
+        escaped = []
+        for name, value in pairs:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{name}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, metric in self.metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for labels, value in metric['values'].items():
+                    if metric['type'] != 'histogram':
+                        lines.append(f'{name}{self.format_labels(labels)} {value}')
+                        continue
+                    for bound, observed in zip(metric['buckets'], value['buckets']):
+                        lines.append(f'{name}_bucket{self.format_labels(labels, [("le", bound)])} {observed}')
+                    lines.append(f'{name}_bucket{self.format_labels(labels, [("le", "+Inf")])} {value["count"]}')
+                    lines.append(f'{name}_sum{self.format_labels(labels)} {value["sum"]}')
+                    lines.append(f'{name}_count{self.format_labels(labels)} {value["count"]}')
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+metrics.register('counter', 'canvas_api_requests_total', 'Canvas API requests by endpoint and status')
+metrics.register('histogram', 'canvas_api_request_seconds', 'Canvas API latency (time to response headers) by endpoint',
+                 MetricsRegistry.DEFAULT_BUCKETS)
+metrics.register('counter', 'canvas_rate_limited_total', 'Canvas requests rejected as rate limited (retried with backoff)')
+metrics.register('counter', 'rate_limit_rejections_total', 'Requests refused by the per-client download limits')
+metrics.register('counter', 'download_bytes_total', 'Bytes downloaded from Canvas')
+metrics.register('counter', 'download_files_total', 'Files finished, by outcome')
+metrics.register('histogram', 'download_file_seconds', 'Per-file transfer time', MetricsRegistry.DEFAULT_BUCKETS)
+metrics.register('histogram', 'download_phase_seconds', 'Time download jobs spend in each phase',
+                 MetricsRegistry.DEFAULT_BUCKETS)
+metrics.register('gauge', 'download_queue_depth', 'Download tasks queued on the shared scheduler')
+metrics.register('gauge', 'download_tasks_running', 'Download tasks running on the shared scheduler')
+metrics.register('gauge', 'download_jobs_active', 'Download jobs running in this process, by status')
+
+API_ID_PATTERN = re.compile(r'/(?:\d+|self)(?=/|$)')
+
+def api_endpoint_label(url):
+    """Endpoint template for a request URL (/api/v1/courses/:id/files); file transfers are 'file'"""
+    path = urlparse(url).path
+    if '/api/v1/' not in path:
+        return 'file'
+    return API_ID_PATTERN.sub('/:id', path[path.index('/api/v1/') + len('/api/v1'):])
+
 # Rate limiting tracking
-course_processing_counts = {}  # {ip: {'count': N, 'reset_time': timestamp}}
-file_download_counts = {}      # {ip: {'hourly': N, 'daily': N, 'hour_reset': timestamp, 'day_reset': timestamp}}
+class TokenBucketLimiter:
+    """Per-client token buckets for one or more (name, capacity, period) limits.
 
-def check_course_processing_limit(client_ip, course_count):
-    """Check if client can process this many courses (100/hour limit)"""
-    now = time.time()
+    Buckets refill continuously at capacity/period tokens per second. Clients are spread
+    over striped locks so concurrent download workers rarely contend, and clients whose
+    buckets have refilled completely are swept every RATE_LIMIT_SWEEP_INTERVAL seconds.
+    """
+    STRIPES = 16
 
-    if client_ip not in course_processing_counts:
-        course_processing_counts[client_ip] = {'count': 0, 'reset_time': now + 3600}
+    def __init__(self, limits):
+        self.limits = limits
+        self.stripes = [({}, threading.Lock()) for _ in range(self.STRIPES)]
+        self.last_sweep = time.time()
 
-    # Reset if hour has passed
-    if now > course_processing_counts[client_ip]['reset_time']:
-        course_processing_counts[client_ip] = {'count': 0, 'reset_time': now + 3600}
+    def _refill(self, buckets, now):
+        for name, capacity, period in self.limits:
+            tokens, updated = buckets.get(name, (capacity, now))
+            buckets[name] = (min(capacity, tokens + (now - updated) * capacity / period), now)
 
-    # Check if adding these courses would exceed limit
-    current_count = course_processing_counts[client_ip]['count']
-    if current_count + course_count > 100:
-        return False, f"Course processing limit exceeded. You can process {100 - current_count} more courses this hour."
+    def reserve(self, client, amount, partial=False):
+        """Take up to amount tokens from every bucket.
 
-    # Update count
-    course_processing_counts[client_ip]['count'] += course_count
-    return True, None
+        Returns (granted, limiting_name, available): all-or-nothing unless partial is set.
+        """
+        now = time.time()
+        clients, lock = self.stripes[hash(client) % self.STRIPES]
+        with lock:
+            buckets = clients.setdefault(client, {})
+            self._refill(buckets, now)
+            limiting, available = min(
+                ((name, int(buckets[name][0])) for name, _, _ in self.limits),
+                key=lambda item: item[1]
+            )
+            granted = amount if available >= amount else (available if partial else 0)
+            for name, _, _ in self.limits:
+                buckets[name] = (buckets[name][0] - granted, now)
+        self._maybe_sweep(now)
+        return granted, limiting, available
 
-def check_file_download_limit(client_ip, file_count=1):
-    """Check if client can download files (500/hour, 2000/day limits)"""
-    now = time.time()
+    def release(self, client, amount):
+        """Return unused reserved tokens"""
+        if amount <= 0:
+            return
+        now = time.time()
+        clients, lock = self.stripes[hash(client) % self.STRIPES]
+        with lock:
+            buckets = clients.setdefault(client, {})
+            self._refill(buckets, now)
+            for name, capacity, _ in self.limits:
+                buckets[name] = (min(capacity, buckets[name][0] + amount), now)
 
-    if client_ip not in file_download_counts:
-        file_download_counts[client_ip] = {
-            'hourly': 0, 'daily': 0,
-            'hour_reset': now + 3600, 'day_reset': now + 86400
-        }
+    def _maybe_sweep(self, now):
+        if now - self.last_sweep < RATE_LIMIT_SWEEP_INTERVAL:
+            return
+        self.last_sweep = now
+        for clients, lock in self.stripes:
+            with lock:
+                for client in list(clients):
+                    buckets = clients[client]
+                    self._refill(buckets, now)
+                    if all(buckets[name][0] >= capacity for name, capacity, _ in self.limits):
+                        del clients[client]  # Idle long enough to be indistinguishable from new
+
+class RedisTokenBucketLimiter:
+    """TokenBucketLimiter backed by Redis so limits hold across server processes.
+
+    Each client is one hash updated atomically by a Lua script using the Redis clock;
+    keys expire after the longest limit period.
+    """
+    RESERVE_SCRIPT = """
+        local now_parts = redis.call('TIME')
+        local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+        local count = tonumber(ARGV[1])
+        local partial = ARGV[2] == '1'
+        local n = (#ARGV - 2) / 2
+        local tokens = {}
+        local available = nil
+        local limiting = 1
+        local ttl = 0
+        for i = 1, n do
+            local capacity = tonumber(ARGV[1 + 2 * i])
+            local period = tonumber(ARGV[2 + 2 * i])
+            local t = tonumber(redis.call('HGET', KEYS[1], 't' .. i) or capacity)
+            local u = tonumber(redis.call('HGET', KEYS[1], 'u' .. i) or now)
+            t = math.min(capacity, t + (now - u) * capacity / period)
+            tokens[i] = t
+            if available == nil or math.floor(t) < available then
+                available = math.floor(t)
+                limiting = i
+            end
+            ttl = math.max(ttl, period)
+        end
+        local granted = 0
+        if available >= count then
+            granted = count
+        elseif partial then
+            granted = available
+        end
+        for i = 1, n do
+            local capacity = tonumber(ARGV[1 + 2 * i])
+            redis.call('HSET', KEYS[1], 't' .. i, tostring(math.min(capacity, tokens[i] - granted)), 'u' .. i, tostring(now))
+        end
+        redis.call('EXPIRE', KEYS[1], math.ceil(ttl))
+        return {granted, limiting, available}
+    """
 
-    counts = file_download_counts[client_ip]
+    def __init__(self, limits, url, prefix):
+        import redis  # Optional dependency, only needed when RATE_LIMIT_STORAGE_URL is set
+        self.limits = limits
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.RESERVE_SCRIPT)
 
-    # Reset hourly if hour has passed
-    if now > counts['hour_reset']:
-        counts['hourly'] = 0
-        counts['hour_reset'] = now + 3600
+    def _run(self, client, amount, partial):
+        args = [amount, '1' if partial else '0']
+        for _, capacity, period in self.limits:
+            args.extend([capacity, period])
+        return self.script(keys=[f'{self.prefix}:{client}'], args=args)
 
-    # Reset daily if day has passed
-    if now > counts['day_reset']:
-        counts['daily'] = 0
-        counts['day_reset'] = now + 86400
+    def reserve(self, client, amount, partial=False):
+        granted, limiting, available = self._run(client, amount, partial)
+        return int(granted), self.limits[int(limiting) - 1][0], int(available)
 
-    # Check limits
-    if counts['hourly'] + file_count > 500:
-        return False, f"Hourly file download limit exceeded. You can download {500 - counts['hourly']} more files this hour."
+    def release(self, client, amount):
+        if amount > 0:
+            self._run(client, -amount, False)  # Negative reservation puts tokens back
 
-    if counts['daily'] + file_count > 2000:
-        return False, f"Daily file download limit exceeded. You can download {2000 - counts['daily']} more files today."
+def create_rate_limiter(limits, prefix):
+    """Build a limiter on the configured storage, falling back to in-process buckets"""
+    if RATE_LIMIT_STORAGE_URL.startswith(('redis://', 'rediss://')):
+        try:
+            return RedisTokenBucketLimiter(limits, RATE_LIMIT_STORAGE_URL, prefix)
+        except ImportError:
+            logging.getLogger(__name__).warning(
+                "RATE_LIMIT_STORAGE_URL is set but the redis package is not installed; using in-process limits"
+            )
+    return TokenBucketLimiter(limits)
+
+course_processing_limiter = create_rate_limiter([('hourly', COURSES_PER_HOUR, 3600)], 'canvas-dl:courses')
+file_download_limiter = create_rate_limiter(
+    [('hourly', FILES_PER_HOUR, 3600), ('daily', FILES_PER_DAY, 86400)], 'canvas-dl:files'
+)
 
-    # Update counts
-    counts['hourly'] += file_count
-    counts['daily'] += file_count
+def check_course_processing_limit(client_ip, course_count):
+    """Check if client can process this many courses (COURSES_PER_HOUR limit)"""
+    granted, _, available = course_processing_limiter.reserve(client_ip, course_count)
+    if granted < course_count:
+        metrics.inc('rate_limit_rejections_total', limit='courses')
+        return False, f"Course processing limit exceeded. You can process {available} more courses this hour."
     return True, None
 
+def file_limit_message(limiting, available):
+    if limiting == 'hourly':
+        return f"Hourly file download limit exceeded. You can download {available} more files this hour."
+    return f"Daily file download limit exceeded. You can download {available} more files today."
+
+def reserve_file_downloads(client_ip, file_count):
+    """Reserve up to file_count downloads at once; returns (granted, message when none granted)"""
+    granted, limiting, available = file_download_limiter.reserve(client_ip, file_count, partial=True)
+    if not granted:
+        metrics.inc('rate_limit_rejections_total', limit=f'files_{limiting}')
+        return 0, file_limit_message(limiting, available)
+    return granted, None
+
+def release_file_downloads(client_ip, file_count):
+    """Give back reserved downloads a job did not use"""
+    file_download_limiter.release(client_ip, file_count)
+
+class AdaptiveThrottle:
+    """Tracks Canvas's X-Rate-Limit-Remaining bucket and adapts a job's concurrency to it.
+
+    Concurrency starts at the job's worker count, halves when the bucket drops below
+    RATE_LIMIT_LOW and grows back by one per response while it is above RATE_LIMIT_HEALTHY.
+    Between responses the last reading is assumed to refill at RATE_LIMIT_REFILL_RATE, so the
+    limit also recovers (one step per second) when only file transfers are running.
+    API requests made while the bucket is low are delayed with jitter.
+    """
+
+    def __init__(self, max_limit, on_limit_change=None):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.on_limit_change = on_limit_change
+        self.remaining = None
+        self.observed_at = 0  # When remaining was read (or last refilled by recover)
+        self.recovered_at = 0
+        self.throttled = 0  # Requests Canvas rejected as rate limited
+        self.lock = threading.Lock()
+
+    def _estimated_remaining(self, now):
+        if self.remaining is None:
+            return None
+        return self.remaining + max(now - self.observed_at, 0) * RATE_LIMIT_REFILL_RATE
+
+    def delay(self):
+        """Seconds to wait before the next API request, growing as the bucket drains"""
+        with self.lock:
+            remaining = self._estimated_remaining(time.time())
+        if remaining is None or remaining >= RATE_LIMIT_LOW:
+            return 0
+        return (1 - max(remaining, 0) / RATE_LIMIT_LOW) * 2 * random.uniform(0.5, 1.5)
+
+    def recover(self):
+        """Grow the limit back by one (at most once a second) while the estimated bucket is healthy"""
+        with self.lock:
+            now = time.time()
+            remaining = self._estimated_remaining(now)
+            if (remaining is None or remaining <= RATE_LIMIT_HEALTHY or self.limit >= self.max_limit
+                    or now - self.recovered_at < 1):
+                return self.limit
+            self.remaining, self.observed_at, self.recovered_at = remaining, now, now
+            self.limit += 1
+            limit = self.limit
+        if self.on_limit_change:
+            self.on_limit_change(limit)
+        return limit
+
+    def observe(self, response):
+        """Update bucket state from a response's rate-limit headers"""
+        header = response.headers.get('X-Rate-Limit-Remaining')
+        if header is None:
+            return
+        try:
+            remaining = float(header)
+        except ValueError:
+            return
+
+        with self.lock:
+            self.remaining = remaining
+            self.observed_at = time.time()
+            previous = self.limit
+            if remaining < RATE_LIMIT_LOW:
+                self.limit = max(1, self.limit // 2)
+            elif remaining > RATE_LIMIT_HEALTHY:
+                self.limit = min(self.max_limit, self.limit + 1)
+            changed = self.limit != previous
+            limit = self.limit
+        if changed and self.on_limit_change:
+            self.on_limit_change(limit)
+
+    def record_throttled(self):
+        metrics.inc('canvas_rate_limited_total')
+        with self.lock:
+            self.throttled += 1
+            self.remaining = 0
+            self.observed_at = time.time()
+            previous, self.limit = self.limit, max(1, self.limit // 2)
+            limit = self.limit
+        if limit != previous and self.on_limit_change:
+            self.on_limit_change(limit)
+
+    @staticmethod
+    def is_throttled(response):
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and 'Rate Limit Exceeded' in response.text
+
+class ThrottledAdapter(HTTPAdapter):
+    """HTTPAdapter that paces API requests by the throttle and retries rate-limited ones with backoff.
+
+    File transfers don't count against Canvas's API bucket, so they are neither paced nor observed.
+    """
+
+    def __init__(self, throttle, **kwargs):
+        self.throttle = throttle
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        endpoint = api_endpoint_label(request.url)
+        if endpoint == 'file':
+            self.throttle.recover()
+            started = time.time()
+            response = super().send(request, **kwargs)
+            metrics.inc('canvas_api_requests_total', endpoint=endpoint, status=response.status_code)
+            metrics.observe('canvas_api_request_seconds', time.time() - started, endpoint=endpoint)
+            return response
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            wait_seconds = self.throttle.delay()
+            if wait_seconds:
+                time.sleep(wait_seconds)
+
+            started = time.time()
+            response = super().send(request, **kwargs)
+            metrics.inc('canvas_api_requests_total', endpoint=endpoint, status=response.status_code)
+            metrics.observe('canvas_api_request_seconds', time.time() - started, endpoint=endpoint)
+            self.throttle.observe(response)
+            if not self.throttle.is_throttled(response) or attempt == RATE_LIMIT_RETRIES:
+                return response
+
+            self.throttle.record_throttled()
+            response.close()
+            backoff = min(2 ** attempt, 60) * random.uniform(0.5, 1.5)
+            logger.warning(f"Canvas rate limit hit, retrying in {backoff:.1f}s")
+            time.sleep(backoff)
+
+def create_http_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, throttle=None):
+    """Create a keep-alive session with a sized connection pool and retry policy"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=['GET', 'HEAD'],
+        raise_on_status=False
+    )
+    if throttle is not None:
+        adapter = ThrottledAdapter(throttle, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file on disk"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def page_number(url):
+    """Numeric ?page= of a Canvas pagination link, or None for bookmark-style (opaque) pages"""
+    if not url:
+        return None
+    page = parse_qs(urlparse(url).query).get('page', [''])[0]
+    return int(page) if page.isdigit() else None
+
+API_KEY_PATTERN = re.compile(r'[a-f0-9]{40,}', re.IGNORECASE)
+ACCESS_TOKEN_PATTERN = re.compile(r'access_token=[^&\s]+', re.IGNORECASE)
+
 def sanitize_log_message(message):
     """Remove API keys and sensitive data from log messages"""
-    import re
     if isinstance(message, str):
         # Remove API keys (40+ character hex strings)
-        message = re.sub(r'[a-f0-9]{40,}', '[API_KEY_REDACTED]', message, flags=re.IGNORECASE)
+        message = API_KEY_PATTERN.sub('[API_KEY_REDACTED]', message)
         # Remove URLs with tokens
-        message = re.sub(r'access_token=[^&\s]+', 'access_token=[REDACTED]', message, flags=re.IGNORECASE)
+        if 'access_token=' in message.lower():
+            message = ACCESS_TOKEN_PATTERN.sub('access_token=[REDACTED]', message)
     return message
 
-def emit_log_to_client(message, log_type='info', socket_id=None):
-    """Helper function to emit logs to frontend via Socket.IO"""
-    timestamp = datetime.now().strftime('%H:%M:%S')
-    sanitized_message = sanitize_log_message(message)
-
-    log_entry = {
-        'message': sanitized_message,
+def make_log_entry(message, log_type='info'):
+    """Build a sanitized, timestamped log entry for the frontend"""
+    return {
+        'message': sanitize_log_message(message),
         'type': log_type,
-        'timestamp': timestamp
+        'timestamp': datetime.now().strftime('%H:%M:%S')
     }
 
+def emit_log_to_client(message, log_type='info', socket_id=None):
+    """Helper function to emit logs to frontend via Socket.IO"""
+    log_entry = make_log_entry(message, log_type)
+    sanitized_message = log_entry['message']
+
     if socket_id:
         socketio.emit('download_log', log_entry, room=socket_id)
         logger.info(f"[Socket {socket_id[:8]}] {sanitized_message}")
@@ -174,8 +657,766 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class MetadataCache:
+    """Process-wide TTL + LRU cache of Canvas metadata (user, courses, folders, file listings).
+
+    Entries are keyed by (api_url, SHA-256 of the token, kind, id) so raw tokens never appear in keys.
+    """
+
+    def __init__(self, max_entries=METADATA_CACHE_SIZE, ttl=METADATA_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # {key: (expires_at, value)}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def account_key(api_url, api_key):
+        return (api_url.rstrip('/'), hashlib.sha256(api_key.encode('utf-8')).hexdigest())
+
+    def get(self, account, kind, ident=None):
+        """Return a cached value, or None if missing or expired"""
+        key = account + (kind, ident)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, account, kind, ident, value):
+        key = account + (kind, ident)
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, account, kind, ident, loader):
+        """Return a cached value, calling loader() and caching its result on a miss"""
+        value = self.get(account, kind, ident)
+        if value is None:
+            value = loader()
+            self.put(account, kind, ident, value)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl
+            }
+
+def bind_requester(obj, requester):
+    """Copy of a cached canvasapi object whose API calls go through requester.
+
+    Cached objects keep the requester of whoever fetched them (another request's plain
+    session, or a finished job's), so methods are only called on copies bound to the
+    caller's own session, with its throttling, retries and metrics.
+    """
+    bound = copy.copy(obj)
+    bound._requester = requester
+    return bound
+
+metadata_cache = MetadataCache()
+course_stats_executor = ThreadPoolExecutor(max_workers=COURSE_STATS_WORKERS, thread_name_prefix='course-stats')
+
+class DownloadScheduler:
+    """Shared worker pool that runs download tasks for every job.
+
+    Each job has its own priority queue (FIFO among equal priorities) and concurrency cap.
+    Workers pick jobs round-robin so a large job cannot starve smaller ones, and transfers per
+    Canvas host are capped.
+    """
+
+    def __init__(self, workers=GLOBAL_DOWNLOAD_WORKERS, per_host=PER_HOST_CONCURRENCY):
+        self.worker_count = workers
+        self.per_host = per_host
+        self.condition = threading.Condition()
+        self.jobs = OrderedDict()  # {job_id: {'host', 'limit', 'running', 'queue'}}
+        self.host_running = {}     # {host: N}
+        self.workers = []
+        self.sequence = count()  # Tie-breaker keeping equal priorities in submission order
+
+    def register_job(self, job_id, host, limit):
+        with self.condition:
+            self.jobs[job_id] = {'host': host, 'limit': limit, 'running': 0, 'queue': []}
+            if not self.workers:
+                for index in range(self.worker_count):
+                    worker = threading.Thread(target=self._worker_loop, name=f'worker-{index}', daemon=True)
+                    worker.start()
+                    self.workers.append(worker)
+
+    def unregister_job(self, job_id):
+        """Remove a job, cancelling any tasks it still has queued"""
+        with self.condition:
+            job = self.jobs.pop(job_id, None)
+        if job:
+            for _, _, future, _, _ in job['queue']:
+                future.cancel()
+
+    def set_job_limit(self, job_id, limit):
+        """Change a job's concurrency cap (used by rate-limit throttling)"""
+        with self.condition:
+            if job_id in self.jobs:
+                self.jobs[job_id]['limit'] = limit
+                self.condition.notify_all()
+
+    def submit(self, job_id, fn, *args, priority=0):
+        """Queue fn(*args) for a job; lower priorities run first"""
+        future = Future()
+        with self.condition:
+            heapq.heappush(self.jobs[job_id]['queue'], (priority, next(self.sequence), future, fn, args))
+            self.condition.notify()
+        return future
+
+    def _next_task(self):
+        """Pick the next runnable task round-robin across jobs (caller holds the condition)"""
+        for job_id, job in list(self.jobs.items()):
+            if not job['queue'] or job['running'] >= job['limit']:
+                continue
+            if self.host_running.get(job['host'], 0) >= self.per_host:
+                continue
+            self.jobs.move_to_end(job_id)  # Next pick starts with the other jobs
+            job['running'] += 1
+            self.host_running[job['host']] = self.host_running.get(job['host'], 0) + 1
+            _, _, future, fn, args = heapq.heappop(job['queue'])
+            return job, (future, fn, args)
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                picked = self._next_task()
+                while picked is None:
+                    self.condition.wait()
+                    picked = self._next_task()
+            job, (future, fn, args) = picked
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.condition:
+                    job['running'] -= 1
+                    self.host_running[job['host']] -= 1
+                    self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'workers': self.worker_count,
+                'per_host': self.per_host,
+                'jobs': {job_id: {'running': job['running'], 'queued': len(job['queue'])} for job_id, job in self.jobs.items()},
+                'hosts': dict(self.host_running)
+            }
+
+download_scheduler = DownloadScheduler()
+
+class JobStore:
+    """SQLite record of download jobs and per-file state, shared by every server process.
+
+    Jobs keep their config, progress, final stats and recent logs after they finish, so status
+    survives restarts and can be served by any process. API tokens are never stored, only a
+    SHA-256 used to check that a resume request comes from the same account.
+    """
+    ACTIVE_STATUSES = ('initializing', 'connecting', 'fetching_courses', 'calculating', 'downloading')
+    RESUMABLE_STATUSES = ('interrupted', 'stopped', 'error')
+
+    def __init__(self, path=JOB_STORE_PATH):
+        self.path = path
+        self.local = threading.local()
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    api_url TEXT NOT NULL,
+                    account_hash TEXT NOT NULL,
+                    output_path TEXT NOT NULL,
+                    selected_courses TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    client_ip TEXT,
+                    owner TEXT,
+                    status TEXT NOT NULL,
+                    progress TEXT,
+                    stats TEXT,
+                    logs TEXT,
+                    stop_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    path TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, file_id)
+                );
+            """)
+
+    def _conn(self):
+        """One connection per thread; WAL lets readers in other processes run alongside a writer"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def create_job(self, manager):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO jobs (id, api_url, account_hash, output_path, selected_courses, options,
+                       client_ip, owner, status, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (manager.download_id, manager.api_url, manager.account[1], manager.output_path,
+                 json.dumps(manager.selected_courses), json.dumps(manager.job_options()),
+                 manager.client_ip, JOB_OWNER, manager.status, now, now)
+            )
+
+    def update_job(self, job_id, status, progress, logs, stats=None):
+        """Heartbeat: persist status, progress and recent logs; returns True if a stop was requested"""
+        with self._conn() as conn:
+            conn.execute(
+                """UPDATE jobs SET status = ?, progress = ?, logs = ?, stats = COALESCE(?, stats),
+                       owner = ?, updated_at = ? WHERE id = ?""",
+                (status, json.dumps(progress), json.dumps(logs), json.dumps(stats) if stats else None,
+                 JOB_OWNER, time.time(), job_id)
+            )
+            row = conn.execute('SELECT stop_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row['stop_requested'])
+
+    def record_files(self, job_id, rows):
+        """Upsert (file_id, path, state) rows for a job"""
+        if not rows:
+            return
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO job_files (job_id, file_id, path, state, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(job_id, file_id, path, state, now) for file_id, path, state in rows]
+            )
+
+    def completed_file_ids(self, job_id):
+        rows = self._conn().execute(
+            "SELECT file_id FROM job_files WHERE job_id = ? AND state IN ('downloaded', 'skipped')", (job_id,)
+        ).fetchall()
+        return {row['file_id'] for row in rows}
+
+    def get_job(self, job_id):
+        """Job row as a dict, with active jobs whose owner stopped heartbeating reported as interrupted"""
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ('selected_courses', 'options', 'progress', 'stats', 'logs'):
+            job[field] = json.loads(job[field]) if job[field] else None
+        if job['status'] in self.ACTIVE_STATUSES and time.time() - job['updated_at'] > JOB_STALE_SECONDS:
+            job['status'] = 'interrupted'
+        return job
+
+    def request_stop(self, job_id):
+        with self._conn() as conn:
+            cursor = conn.execute('UPDATE jobs SET stop_requested = 1 WHERE id = ?', (job_id,))
+        return cursor.rowcount > 0
+
+    def clear_stop(self, job_id):
+        with self._conn() as conn:
+            conn.execute('UPDATE jobs SET stop_requested = 0 WHERE id = ?', (job_id,))
+
+JOB_OWNER = f'{socket.gethostname()}:{os.getpid()}'
+job_store = JobStore()
+
+class LogBuffer:
+    """Fixed-capacity ring buffer of a job's log entries, addressed by increasing sequence numbers"""
+
+    def __init__(self, capacity=LOG_BUFFER_SIZE):
+        self.entries = deque(maxlen=capacity)
+        self.next_seq = 1
+        self.lock = threading.Lock()
+
+    def append(self, log_entry):
+        with self.lock:
+            log_entry['seq'] = self.next_seq
+            self.next_seq += 1
+            self.entries.append(log_entry)
+
+    def tail(self, limit):
+        with self.lock:
+            return list(islice(self.entries, max(0, len(self.entries) - limit), None))
+
+    def since(self, cursor, limit):
+        """Entries after cursor (at most limit), the new cursor, and how many were evicted unseen"""
+        with self.lock:
+            if not self.entries:
+                return [], cursor, 0
+            first_seq = self.entries[0]['seq']
+            start = max(0, cursor + 1 - first_seq)
+            entries = list(islice(self.entries, start, start + limit))
+            missed = max(0, first_seq - cursor - 1)
+        next_cursor = entries[-1]['seq'] if entries else max(cursor, first_seq - 1)
+        return entries, next_cursor, missed
+
+class EventBatcher:
+    """Coalesces a job's Socket.IO progress and log events into periodic batches.
+
+    Each flush sends the latest progress snapshot once and all waiting log entries as a
+    single download_log_batch event. Flushes happen every PROGRESS_EMIT_INTERVAL seconds,
+    or as soon as PROGRESS_EMIT_BATCH_SIZE log entries are waiting.
+    """
+
+    def __init__(self, socket_id, progress_source, interval=PROGRESS_EMIT_INTERVAL, batch_size=PROGRESS_EMIT_BATCH_SIZE,
+                 on_tick=None):
+        self.socket_id = socket_id
+        self.progress_source = progress_source
+        self.on_tick = on_tick
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending_logs = []
+        self.progress_dirty = False
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # Keeps batches in order across threads
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='event-batcher', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+            if self.on_tick:
+                self.on_tick()
+
+    def add_progress(self):
+        with self.lock:
+            self.progress_dirty = True
+
+    def add_log(self, log_entry):
+        with self.lock:
+            self.pending_logs.append(log_entry)
+            full = len(self.pending_logs) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                logs, self.pending_logs = self.pending_logs, []
+                progress_dirty, self.progress_dirty = self.progress_dirty, False
+            if logs:
+                socketio.emit('download_log_batch', {'entries': logs}, room=self.socket_id)
+            if progress_dirty:
+                socketio.emit('download_progress', self.progress_source(), room=self.socket_id)
+
+    def close(self):
+        """Stop the flush timer and deliver everything still pending"""
+        self.stopped.set()
+        self.flush()
+
+def parse_timestamp(value):
+    """Naive UTC datetime from a Canvas timestamp or an ISO date/datetime; None if it can't be read"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class FileFilter:
+    """Job-level content filters, checked against Canvas listing metadata before any bytes are fetched.
+
+    extensions and contentTypes together form one allow-list (content types may end in '/*').
+    folders are globs matched against the file's folder name in the course directory: the
+    sanitized Canvas folder name (each Canvas folder is one flat directory, so patterns never
+    contain '/'), 'assignments' or 'unfiled', e.g. 'Lectures', 'Week *' or 'assignments'.
+    Files whose size or timestamp is missing are kept, since there is nothing to judge them by.
+    """
+
+    def __init__(self, extensions=None, content_types=None, max_size=None, folders=None, modified_after=None):
+        self.extensions = {ext.lower().lstrip('.') for ext in extensions or []}
+        self.content_types = [content_type.lower() for content_type in content_types or []]
+        self.max_size = max_size
+        self.folders = list(folders or [])
+        self.modified_after = modified_after
+        self.cutoff = parse_timestamp(modified_after) if modified_after else None
+
+    @classmethod
+    def from_options(cls, options):
+        """Build from the request's 'filters' object; raises ValueError with a client-facing message"""
+        options = options or {}
+        if not isinstance(options, dict):
+            raise ValueError('filters must be an object')
+
+        def string_list(key):
+            value = options.get(key) or []
+            if isinstance(value, str):
+                value = [part.strip() for part in value.split(',') if part.strip()]
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f'filters.{key} must be a list of strings')
+            return value
+
+        max_size = options.get('maxSize')
+        if max_size is not None and (not isinstance(max_size, int) or isinstance(max_size, bool) or max_size < 0):
+            raise ValueError('filters.maxSize must be a non-negative number of bytes')
+        modified_after = options.get('modifiedAfter') or None
+        if modified_after is not None and parse_timestamp(modified_after) is None:
+            raise ValueError('filters.modifiedAfter must be an ISO date, e.g. 2024-01-31')
+
+        return cls(string_list('extensions'), string_list('contentTypes'), max_size, string_list('folders'), modified_after)
+
+    def options(self):
+        """The filters in request form, persisted with the job so a resume applies the same ones"""
+        options = {
+            'extensions': sorted(self.extensions),
+            'contentTypes': self.content_types,
+            'maxSize': self.max_size,
+            'folders': self.folders,
+            'modifiedAfter': self.modified_after
+        }
+        return {key: value for key, value in options.items() if value not in (None, [])}
+
+    @property
+    def active(self):
+        return bool(self.options())
+
+    def matches(self, file, folder_name):
+        """True if a listed file passes every filter"""
+        if self.extensions or self.content_types:
+            name = getattr(file, 'filename', None) or getattr(file, 'display_name', '') or ''
+            extension = os.path.splitext(name)[1].lower().lstrip('.')
+            content_type = str(getattr(file, 'content-type', None) or getattr(file, 'content_type', '')).lower()
+            if extension not in self.extensions and not any(
+                content_type == allowed or (allowed.endswith('/*') and content_type.startswith(allowed[:-1]))
+                for allowed in self.content_types
+            ):
+                return False
+
+        size = getattr(file, 'size', None)
+        if self.max_size is not None and size is not None and size > self.max_size:
+            return False
+
+        if self.folders:
+            if not any(fnmatch.fnmatch(folder_name, pattern) for pattern in self.folders):
+                return False
+
+        if self.cutoff is not None:
+            modified = parse_timestamp(getattr(file, 'modified_at', None) or getattr(file, 'updated_at', None) or '')
+            if modified is not None and modified <= self.cutoff:
+                return False
+
+        return True
+
+class FileWriter:
+    """Filesystem stage for one download job.
+
+    Remembers the directories it has created, so each directory costs one makedirs instead of
+    exists/makedirs per file. Every file is written under a temporary name and committed with
+    os.replace, so a crash never leaves a truncated file at the final path. Large files can
+    be preallocated (PREALLOCATE_FILES), and fsyncs follow FSYNC_MODE.
+
+    Names that collide after sanitizing resolve by Canvas id, not listing order: the lowest
+    id keeps the bare name and the others get a " (<canvas id>)" suffix. A file that has
+    started downloading, or whose path an earlier sync recorded (known_paths), keeps its
+    name, so existing files are never renamed when a new colliding file appears.
+    """
+
+    def __init__(self, fsync_mode=FSYNC_MODE, batch_size=FSYNC_BATCH_SIZE, preallocate=PREALLOCATE_FILES,
+                 preallocate_min_size=PREALLOCATE_MIN_SIZE, known_paths=None):
+        self.fsync_mode = fsync_mode
+        self.batch_size = max(1, batch_size)
+        self.preallocate_files = preallocate and hasattr(os, 'posix_fallocate')
+        self.preallocate_min_size = preallocate_min_size
+        self.created_dirs = set()
+        self.claims = {}      # {(directory, name): file_id}
+        self.names = {}       # {(file_id, directory): name}
+        self.settled = set()  # {(file_id, directory)} whose names can no longer move
+        self.unsynced = []    # Committed paths waiting for a batched fsync
+        self.lock = threading.Lock()
+        for path, file_id in (known_paths or {}).items():
+            # Earlier syncs' files hold their names (a file renamed on Canvas still gets its new name)
+            directory, name = os.path.split(path)
+            self.claims[(directory, name)] = file_id
+            self.settled.add((file_id, directory))
+
+    @staticmethod
+    def suffixed(name, file_id):
+        root, ext = os.path.splitext(name)
+        return f'{root} ({file_id}){ext}'
+
+    def claim(self, directory, file_id, raw_name, settle=False):
+        """Sanitized name for a file in a directory (see the class docstring for collisions).
+
+        settle=True fixes the name: call it when the file's download starts.
+        """
+        with self.lock:
+            name = self.names.get((file_id, directory))
+            if name is None:
+                name = sanitize_filename(raw_name)
+                holder = self.claims.get((directory, name))
+                if holder is not None and holder != file_id:
+                    if file_id < holder and (holder, directory) not in self.settled:
+                        # The holder hasn't started: hand it the suffixed name instead
+                        moved = self.suffixed(name, holder)
+                        self.names[(holder, directory)] = moved
+                        self.claims[(directory, moved)] = holder
+                    else:
+                        name = self.suffixed(name, file_id)
+                self.claims[(directory, name)] = file_id
+                self.names[(file_id, directory)] = name
+            if settle:
+                self.settled.add((file_id, directory))
+            return name
+
+    def ensure_parent(self, path):
+        directory = os.path.dirname(path)
+        if directory in self.created_dirs:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            self.created_dirs.add(directory)
+
+    @staticmethod
+    def temp_path(path):
+        return path + '.tmp'
+
+    def preallocate(self, f, size):
+        """Reserve size bytes for an open file of at least preallocate_min_size.
+
+        Off by default: where the filesystem has no fallocate (e.g. NFSv3), glibc emulates it by
+        writing every block, doubling the writes.
+        """
+        if self.preallocate_files and size and size >= self.preallocate_min_size:
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError:
+                pass
+
+    def open_temp(self, path, size=None):
+        """Open path's temporary file for writing, preallocated when the size is known"""
+        f = open(self.temp_path(path), 'wb')
+        self.preallocate(f, size)
+        return f
+
+    @staticmethod
+    def finish(f):
+        """Trim preallocated space the transfer did not fill"""
+        f.truncate(f.tell())
+
+    def commit(self, path, temp_path=None):
+        """Atomically move a finished temporary file into place"""
+        temp_path = temp_path or self.temp_path(path)
+        if self.fsync_mode == 'always':
+            self._fsync(temp_path)
+        os.replace(temp_path, path)
+        if self.fsync_mode == 'always':
+            self._fsync(os.path.dirname(path))
+        elif self.fsync_mode == 'batch':
+            with self.lock:
+                self.unsynced.append(path)
+                full = len(self.unsynced) >= self.batch_size
+            if full:
+                self.flush()
+
+    def flush(self):
+        """fsync committed files and each of their directories once"""
+        with self.lock:
+            paths, self.unsynced = self.unsynced, []
+        for path in paths:
+            self._fsync(path)
+        for directory in {os.path.dirname(path) for path in paths}:
+            self._fsync(directory)
+
+    @staticmethod
+    def _fsync(path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return  # Removed since, or a directory that can't be opened on this platform
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+def has_complete_copy(file, file_path):
+    """True if file_path exists with the Canvas file's size (when Canvas reports one).
+
+    Interrupted transfers from older versions wrote straight to the final path, so a file
+    existing there does not mean it is complete.
+    """
+    try:
+        local_size = os.path.getsize(file_path)
+    except OSError:
+        return False
+    size = getattr(file, 'size', None)
+    return size is None or local_size == size
+
+class SyncManifest:
+    """JSON-lines record of downloaded Canvas files for one output root, keyed by file id"""
+    FILENAME = '.canvas_manifest.jsonl'
+
+    def __init__(self, output_path):
+        self.path = os.path.join(output_path, self.FILENAME)
+        self.entries = {}  # {file_id: {'id', 'path', 'size', 'updated_at', 'sha256'}}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Load entries from disk; later lines override earlier ones"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry['id']] = entry
+                except (ValueError, KeyError):
+                    continue  # Skip lines truncated by an interrupted run
+
+    def get(self, file_id):
+        with self.lock:
+            return self.entries.get(file_id)
+
+    def is_current(self, file, file_path):
+        """Check if the local copy matches the Canvas file's size and updated_at"""
+        entry = self.get(file.id)
+        return bool(
+            entry
+            and entry['path'] == file_path
+            and entry['size'] == getattr(file, 'size', None)
+            and entry['updated_at'] == getattr(file, 'updated_at', None)
+            and has_complete_copy(file, file_path)
+        )
+
+    def record(self, file, file_path, content_hash=None):
+        """Append an entry for a file that is now present on disk"""
+        entry = {
+            'id': file.id,
+            'path': file_path,
+            'size': getattr(file, 'size', None),
+            'updated_at': getattr(file, 'updated_at', None),
+            'sha256': content_hash
+        }
+        with self.lock:
+            self.entries[file.id] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def compact(self):
+        """Rewrite the manifest with one line per file id"""
+        with self.lock:
+            if not self.entries:
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry) + '\n')
+            os.replace(tmp_path, self.path)
+
+class BlobStore:
+    """Content-addressed store of downloaded files under <output>/.blobs, shared by every course.
+
+    Blobs are named by SHA-256. Canvas file uuids (and md5 when Canvas reports one) are indexed
+    to their blob so an already-stored file can be linked into a new path without fetching it.
+    """
+    DIRNAME = '.blobs'
+
+    def __init__(self, output_path):
+        self.root = os.path.join(output_path, self.DIRNAME)
+        self.index_path = os.path.join(self.root, 'index.jsonl')
+        self.index = {}  # {'uuid:<uuid>' | 'md5:<md5>': sha256}
+        self.lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self.index[entry['key']] = entry['sha256']
+                    except (ValueError, KeyError):
+                        continue
+
+    @staticmethod
+    def file_keys(file):
+        keys = []
+        if getattr(file, 'uuid', None):
+            keys.append(f'uuid:{file.uuid}')
+        if getattr(file, 'md5', None):
+            keys.append(f'md5:{file.md5}')
+        return keys
+
+    def blob_path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def lookup(self, file):
+        """Blob path and hash for a Canvas file already in the store, or (None, None)"""
+        with self.lock:
+            sha256 = next((self.index[key] for key in self.file_keys(file) if key in self.index), None)
+        if sha256 is None:
+            return None, None
+        path = self.blob_path(sha256)
+        size = getattr(file, 'size', None)
+        if not os.path.exists(path) or (size and os.path.getsize(path) != size):
+            return None, None
+        return path, sha256
+
+    def link_into(self, blob_path, dest_path):
+        """Hardlink a blob to dest_path (copy if links are unsupported), replacing any existing file"""
+        tmp_path = dest_path + '.link'
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            shutil.copyfile(blob_path, tmp_path)  # Different filesystem or no hardlink support
+        os.replace(tmp_path, dest_path)
+
+    def ingest(self, file, path, sha256):
+        """Store a freshly downloaded file; if its content is already stored, swap it for a link.
+
+        Returns True when the content was a duplicate.
+        """
+        blob = self.blob_path(sha256)
+        duplicate = os.path.exists(blob)
+        if duplicate:
+            self.link_into(blob, path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+            except OSError:
+                shutil.copyfile(path, blob)
+
+        with self.lock:
+            new_keys = [key for key in self.file_keys(file) if self.index.get(key) != sha256]
+            for key in new_keys:
+                self.index[key] = sha256
+            if new_keys:
+                with open(self.index_path, 'a', encoding='utf-8') as f:
+                    for key in new_keys:
+                        f.write(json.dumps({'key': key, 'sha256': sha256}) + '\n')
+        return duplicate
+
 class DownloadManager:
-    def __init__(self, download_id, api_url, api_key, output_path, selected_courses, socket_id, client_ip):
+    def __init__(self, download_id, api_url, api_key, output_path, selected_courses, socket_id, client_ip,
+                 max_workers=DOWNLOAD_WORKERS, dedup=DEDUP_MODE, filters=None, schedule=SCHEDULE_POLICY):
         self.download_id = download_id
         self.api_url = api_url
         self.api_key = api_key
@@ -183,327 +1424,1704 @@ class DownloadManager:
         self.selected_courses = selected_courses
         self.socket_id = socket_id
         self.client_ip = client_ip
+        self.max_workers = max(1, min(int(max_workers), MAX_DOWNLOAD_WORKERS))
+        self.account = MetadataCache.account_key(api_url, api_key)
+        self.throttle = AdaptiveThrottle(
+            self.max_workers,
+            on_limit_change=lambda limit: download_scheduler.set_job_limit(self.download_id, limit)
+        )
+        # Each worker may hold one connection per segment of a segmented download
+        self.session = create_http_session(
+            max(self.max_workers * max(1, SEGMENTED_DOWNLOAD_SEGMENTS), HTTP_POOL_SIZE), throttle=self.throttle
+        )
         self.canvas = None
         self.user = None
+        self.connection_error = None  # Why initialize_canvas failed, for callers that report it
         self.status = 'initializing'
-        self.progress = {'current': 0, 'total': 0, 'current_file': ''}
-        self.logs = []
+        self.phase_started = None
+        self.phase_timings = {}  # {phase: seconds}
+        self.progress = {'current': 0, 'total': 0, 'current_file': '', 'discovering': False}
+        self.progress_lock = threading.Lock()
+        self.pipeline_slots = threading.Semaphore(PIPELINE_QUEUE_SIZE)
+        self.manifest = SyncManifest(output_path) if INCREMENTAL_SYNC else None
+        self.blob_store = BlobStore(output_path) if dedup else None
+        # Paths from earlier syncs stay put when a new file with a colliding name appears
+        self.writer = FileWriter(known_paths={
+            entry['path']: file_id for file_id, entry in self.manifest.entries.items()
+        } if self.manifest is not None else None)
+        self.file_filter = FileFilter.from_options(filters)
+        self.schedule = schedule
+        self.filtered_files = 0
+        self.filtered_bytes = 0
+        self.deduplicated_files = 0
+        self.deduplicated_bytes = 0
+        self.skipped_files = 0
+        self.download_allowance = 0  # File downloads reserved from the client's limit but not yet used
+        self.bytes_downloaded = 0
+        self.download_started = None
+        self.events = EventBatcher(socket_id, self.progress_snapshot, on_tick=self.sync_job_state)
+        self.logs = LogBuffer()
         self.should_stop = False
+        self.completed_file_ids = set()  # Finished by an earlier run of this job (resume)
+        self.file_states = []  # (file_id, path, state) rows waiting to be written to the job store
+        self.last_job_sync = 0
+        self.host = urlparse(api_url).netloc
+        self.worker_stats = {}  # {thread_name: {'files': N, 'bytes': N, 'seconds': S}}
         
-    def emit_progress(self, data):
-        """Emit progress update to the specific client"""
-        socketio.emit('download_progress', data, room=self.socket_id)
+    def job_options(self):
+        """Constructor options persisted with the job so it can be resumed"""
+        return {
+            'max_workers': self.max_workers,
+            'dedup': self.blob_store is not None,
+            'filters': self.file_filter.options(),
+            'schedule': self.schedule
+        }
+
+    def start(self):
+        """Run the job on a background thread"""
+        thread = threading.Thread(target=self.run_download)
+        thread.daemon = True
+        thread.start()
+
+    def record_file_state(self, file, path, state):
+        metrics.inc('download_files_total', outcome=state)
+        with self.progress_lock:
+            self.file_states.append((file.id, path, state))
+
+    TIMED_PHASES = ('connecting', 'fetching_courses', 'calculating', 'downloading')
+
+    def enter_phase(self, status):
+        """Set the job status, recording how long the job spent in the phase it leaves"""
+        now = time.time()
+        with self.progress_lock:
+            if self.status in self.TIMED_PHASES and self.phase_started is not None:
+                elapsed = now - self.phase_started
+                self.phase_timings[self.status] = self.phase_timings.get(self.status, 0) + elapsed
+                metrics.observe('download_phase_seconds', elapsed, phase=self.status)
+            self.status = status
+            self.phase_started = now
+
+    def phase_report(self):
+        """Seconds spent per phase, including the time so far in the current one"""
+        with self.progress_lock:
+            report = {phase: round(seconds, 3) for phase, seconds in self.phase_timings.items()}
+            if self.status in self.TIMED_PHASES and self.phase_started is not None:
+                report[self.status] = round(report.get(self.status, 0) + time.time() - self.phase_started, 3)
+        return report
+
+    def sync_job_state(self, force=False):
+        """Write progress, recent logs and per-file states to the job store and pick up remote stop requests"""
+        now = time.time()
+        if not force and now - self.last_job_sync < JOB_STORE_SYNC_INTERVAL:
+            return
+        self.last_job_sync = now
+        with self.progress_lock:
+            file_states, self.file_states = self.file_states, []
+        try:
+            job_store.record_files(self.download_id, file_states)
+            stats = {
+                'skipped_files': self.skipped_files,
+                'filtered_files': self.filtered_files,
+                'bytes_downloaded': self.bytes_downloaded,
+                'throttled_requests': self.throttle.throttled,
+                'phase_seconds': self.phase_report()
+            } if force else None
+            if job_store.update_job(self.download_id, self.status, self.progress_snapshot(), self.logs.tail(50), stats):
+                self.should_stop = True
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update job store for {self.download_id}: {str(e)}")
+
+    def progress_snapshot(self):
+        """Current progress with transfer rate and ETA"""
+        with self.progress_lock:
+            snapshot = dict(self.progress)
+            bytes_downloaded = self.bytes_downloaded
+        elapsed = time.time() - self.download_started if self.download_started else 0
+        snapshot['bytes_downloaded'] = bytes_downloaded
+        snapshot['bytes_per_sec'] = int(bytes_downloaded / elapsed) if elapsed else 0
+        remaining = snapshot['total'] - snapshot['current']
+        if snapshot['discovering'] or not snapshot['current'] or remaining <= 0:
+            snapshot['eta_seconds'] = None  # The total is only a lower bound while listing
+        else:
+            snapshot['eta_seconds'] = int(remaining * elapsed / snapshot['current'])
+        return snapshot
+
+    def emit_progress(self):
+        """Queue a progress update for the specific client (sent with the next batch)"""
+        self.events.add_progress()
         
     def emit_log(self, message, log_type='info'):
-        """Emit log message to the specific client"""
-        timestamp = datetime.now().strftime('%H:%M:%S')
-        log_entry = {
-            'message': message,
-            'type': log_type,
-            'timestamp': timestamp
-        }
+        """Queue a log message for the specific client (sent with the next batch)"""
+        log_entry = make_log_entry(message, log_type)
         self.logs.append(log_entry)
-        emit_log_to_client(message, log_type, self.socket_id)
+        self.events.add_log(log_entry)
+        logger.info(f"[Socket {self.socket_id[:8]}] {log_entry['message']}")
+
+    def emit_status(self):
+        """Deliver pending events and the job status immediately (terminal states)"""
+        self.events.flush()
+        socketio.emit('download_status', {'status': self.status}, room=self.socket_id)
         
     def initialize_canvas(self):
         """Initialize Canvas API connection"""
         try:
             self.canvas = Canvas(self.api_url, self.api_key)
-            self.user = self.canvas.get_current_user()
+            # Share the pooled session with canvasapi so API calls and file.download reuse connections
+            self.canvas._Canvas__requester._session = self.session
+            self.user = self.bind(metadata_cache.get_or_load(self.account, 'user', None, self.canvas.get_current_user))
             self.emit_log(f'Connected to Canvas as {self.user.name}', 'success')
             return True
         except Exception as e:
+            self.connection_error = e
             self.emit_log(f'Failed to connect to Canvas: {str(e)}', 'error')
             return False
+
+    def bind(self, obj):
+        """A cached canvasapi object rebound onto this job's throttled session"""
+        return bind_requester(obj, self.canvas._Canvas__requester)
             
     def ensure_directory(self, path):
-        """Create directory if it doesn't exist"""
+        """Create the file's directory unless this job already has"""
         try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.writer.ensure_parent(path)
             return True
         except Exception as e:
             self.emit_log(f'Failed to create directory {path}: {str(e)}', 'error')
             return False
+
+    def target_name(self, file, folder_path, attachment=False, settle=False):
+        """On-disk name for a file: claimed when listed, settled (settle=True) when its download starts"""
+        if attachment:
+            raw_name = file.filename  # Attachments keep their uploaded filename
+        else:
+            raw_name = getattr(file, 'display_name', None) or getattr(file, 'filename', f'file_{file.id}')
+        return self.writer.claim(folder_path, file.id, raw_name, settle)
             
-    def should_download_file(self, file_path):
-        """Check if file should be downloaded (doesn't exist)"""
-        return not os.path.exists(file_path)
+    def should_download_file(self, file_path, file=None):
+        """Check if file should be downloaded (new, or changed on Canvas since the last sync)"""
+        if file is not None and file.id in self.completed_file_ids and has_complete_copy(file, file_path):
+            return False
+
+        if self.manifest is None or file is None:
+            return not os.path.exists(file_path)
+
+        if self.manifest.is_current(file, file_path):
+            return False
+
+        if self.manifest.get(file.id) is None and has_complete_copy(file, file_path):
+            # Downloaded before the manifest existed: adopt it rather than re-fetching
+            self.manifest.record(file, file_path)
+            return False
+
+        return True
+
+    def reserve_download_slot(self):
+        """Use one reserved file download, reserving a batch from the client's limit when empty"""
+        with self.progress_lock:
+            if self.download_allowance > 0:
+                self.download_allowance -= 1
+                return True, None
+            remaining = self.progress['total'] - self.progress['current']
+
+        granted, limit_message = reserve_file_downloads(self.client_ip, max(1, min(FILE_RESERVATION_BATCH, remaining)))
+        if not granted:
+            return False, limit_message
+        with self.progress_lock:
+            self.download_allowance += granted - 1
+        return True, None
+
+    def mark_skipped(self, file, file_path):
+        with self.progress_lock:
+            self.skipped_files += 1
+        self.record_file_state(file, file_path, 'skipped')
+
+    def record_download(self, file, file_path, content_hash=None):
+        """Record a completed download in the job store, sync manifest and blob store"""
+        self.record_file_state(file, file_path, 'downloaded')
+        if self.manifest is None and self.blob_store is None:
+            return
+        content_hash = content_hash or hash_file(file_path)
+        if self.manifest is not None:
+            self.manifest.record(file, file_path, content_hash)
+        if self.blob_store is not None and self.blob_store.ingest(file, file_path, content_hash):
+            self.record_deduplicated(file)
+
+    def record_deduplicated(self, file):
+        with self.progress_lock:
+            self.deduplicated_files += 1
+            self.deduplicated_bytes += getattr(file, 'size', 0) or 0
+
+    def link_stored_copy(self, file, full_path):
+        """Link an already-stored copy of this file into place; returns False if it isn't stored"""
+        if self.blob_store is None:
+            return False
+        blob_path, content_hash = self.blob_store.lookup(file)
+        if blob_path is None:
+            return False
+        self.blob_store.link_into(blob_path, full_path)
+        self.record_deduplicated(file)
+        self.record_download(file, full_path, content_hash)
+        return True
         
-    def download_file(self, file, file_path, course_code):
-        """Download a single file"""
+    def download_file(self, file, file_path, course_code, attachment=False):
+        """Download a single course file, or a submission attachment when attachment=True"""
         if self.should_stop:
             return False
 
-        # Check file download rate limit
-        can_download, limit_message = check_file_download_limit(self.client_ip)
-        if not can_download:
-            self.emit_log(limit_message, 'error')
-            return False  # Stop downloading due to rate limit
-
+        file_name = getattr(file, 'filename', f'file_{file.id}')
+        kind = ' assignment' if attachment else ''
         try:
-            # Get file name safely
-            try:
-                file_name = file.display_name
-            except AttributeError:
-                file_name = getattr(file, 'filename', f'file_{file.id}')
-                
-            file_name = sanitize_filename(file_name)
+            file_name = self.target_name(file, file_path, attachment, settle=True)
             full_path = os.path.join(file_path, file_name)
             
-            if not self.should_download_file(full_path):
-                self.emit_log(f'Skipping existing file: {file_name}', 'info')
+            if not self.should_download_file(full_path, file):
+                self.mark_skipped(file, full_path)
+                self.emit_log(f'Skipping unchanged file: {file_name}', 'info')
                 return True
-                
+
             if not self.ensure_directory(full_path):
                 return False
+
+            if self.link_stored_copy(file, full_path):
+                self.emit_log(f'Linked duplicate{kind}: {file_name}', 'success')
+                return True
+
+            # Check file download rate limit
+            can_download, limit_message = self.reserve_download_slot()
+            if not can_download:
+                self.emit_log(limit_message, 'error')
+                return False  # Stop downloading due to rate limit
                 
             # Update progress
-            self.progress['current_file'] = f"{course_code}/{file_name}"
-            self.emit_progress(self.progress)
+            self.progress['current_file'] = f"{course_code}/assignments/{file_name}" if attachment else f"{course_code}/{file_name}"
+            self.emit_progress()
             
             # Download file
-            file_size = getattr(file, 'size', 0)
-            if file_size and file_size > 100000000:  # 100MB
-                self._download_large_file(file, full_path)
-            else:
-                file.download(full_path)
+            if not self.transfer_file(file, full_path):
+                self.emit_log(f'Paused: {file_name} (will resume on next run)', 'warning')
+                return False
                 
-            self.emit_log(f'Downloaded: {file_name}', 'success')
+            self.emit_log(f'Downloaded{kind}: {file_name}', 'success')
             return True
             
         except (Unauthorized, ResourceDoesNotExist) as e:
             self.emit_log(f'Access denied for file {file_name}: {str(e)}', 'warning')
+            self.record_file_state(file, file_path, 'failed')
             return True  # Continue with other files
         except Exception as e:
             self.emit_log(f'Failed to download {file_name}: {str(e)}', 'error')
+            self.record_file_state(file, file_path, 'failed')
             return True  # Continue with other files
             
+    def transfer_file(self, file, full_path):
+        """Stream a Canvas file or attachment to disk; returns False if stopped mid-transfer.
+
+        Bodies are never buffered whole: each transfer (or each segment of a segmented one)
+        holds at most one DOWNLOAD_CHUNK_SIZE chunk, so peak download memory per job is about
+        (max_workers * SEGMENTED_DOWNLOAD_SEGMENTS + 1) * DOWNLOAD_CHUNK_SIZE.
+        """
+        # Every path writes a temporary file and renames it over full_path, so a file hardlinked
+        # to a deduplicated blob is replaced rather than overwritten in place
+        started = time.time()
+        file_size = getattr(file, 'size', 0)
+        completed, content_hash = None, None  # Hash of a file streamed in one piece; else record_download reads it back
+        if file_size and SEGMENTED_DOWNLOAD_SEGMENTS > 1 and file_size >= SEGMENTED_DOWNLOAD_MIN_SIZE:
+            completed = self._download_segmented_file(file, full_path)
+        if completed is None:
+            if file_size and file_size > 100000000:  # 100MB
+                completed, content_hash = self._download_large_file(file, full_path)
+            else:
+                completed, content_hash = self._download_small_file(file, full_path)
+        if not completed:
+            return False
+        self.record_worker_stats(file_size or 0, time.time() - started)
+        self.record_download(file, full_path, content_hash)
+        return True
+
+    def _download_small_file(self, file, file_path):
+        """Stream a file to a temporary file and commit it into place, removing it if the transfer fails.
+
+        Returns (completed, sha256), hashing the body as it streams.
+        """
+        temp_path = self.writer.temp_path(file_path)
+        digest = hashlib.sha256()
+        try:
+            with self.session.get(file.url, stream=True, allow_redirects=True, timeout=30) as response:
+                response.raise_for_status()
+                with self.writer.open_temp(file_path, getattr(file, 'size', None)) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if self.should_stop:
+                            break
+                        f.write(chunk)
+                        digest.update(chunk)
+                    self.writer.finish(f)
+            if self.should_stop:
+                os.remove(temp_path)  # Remove partial download
+                return False, None
+            self.writer.commit(file_path)
+            return True, digest.hexdigest()
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)  # Remove partial download
+            raise
+
+    def record_worker_stats(self, num_bytes, seconds):
+        """Accumulate transfer stats for the calling worker thread"""
+        worker = threading.current_thread().name
+        with self.progress_lock:
+            stats = self.worker_stats.setdefault(worker, {'files': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['files'] += 1
+            stats['bytes'] += num_bytes
+            stats['seconds'] += seconds
+            self.bytes_downloaded += num_bytes
+        metrics.inc('download_bytes_total', num_bytes)
+        metrics.observe('download_file_seconds', seconds)
+
+    def log_worker_throughput(self):
+        """Emit per-worker throughput summary"""
+        for worker, stats in sorted(self.worker_stats.items()):
+            rate = stats['bytes'] / stats['seconds'] / 1024 / 1024 if stats['seconds'] else 0
+            self.emit_log(
+                f"{worker}: {stats['files']} files, {stats['bytes'] / 1024 / 1024:.1f} MB, {rate:.2f} MB/s",
+                'info'
+            )
+
+    def advance_progress(self):
+        """Count one finished file and emit a progress snapshot"""
+        with self.progress_lock:
+            self.progress['current'] += 1
+        self.emit_progress()
+
+    def _download_and_advance(self, file, file_path, course_code, attachment=False):
+        """Worker task: download one file, then advance the progress counter"""
+        try:
+            if self.should_stop:
+                return False
+            result = self.download_file(file, file_path, course_code, attachment)
+            self.advance_progress()
+            return result
+        finally:
+            self.pipeline_slots.release()
+
+    def wait_for_downloads(self, futures):
+        """Wait for submitted downloads, cancelling queued ones if the job is stopped"""
+        for future in as_completed(futures):
+            if self.should_stop:
+                for pending in futures:
+                    pending.cancel()
+            try:
+                future.result()
+            except Exception as e:
+                if not future.cancelled():
+                    self.emit_log(f'Download worker error: {str(e)}', 'error')
+
+    def _read_part_state(self, state_path):
+        """Load the sidecar state stored next to a .part file"""
+        if not os.path.exists(state_path):
+            return {}
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _download_segmented_file(self, file, file_path):
+        """Fetch a large file as parallel byte ranges positionally written into a full-size .part file.
+
+        Returns None when the server does not advertise byte ranges (the caller falls back to a
+        single stream), True once complete and renamed into place, or False if stopped. Segment
+        offsets are saved next to the .part file so a later run resumes them. Segments are
+        capped by the job's throttle limit, so a rate-limited job also fetches fewer ranges.
+        """
+        if not hasattr(os, 'pwrite'):
+            return None
+
+        try:
+            with self.session.head(file.url, allow_redirects=True, timeout=30) as probe:
+                size = int(probe.headers.get('Content-Length') or getattr(file, 'size', 0) or 0)
+                if probe.status_code != 200 or probe.headers.get('Accept-Ranges', '').lower() != 'bytes' or not size:
+                    return None
+                url = probe.url  # Resolved CDN location, so segments skip the redirect
+                etag = probe.headers.get('ETag')
+        except (requests.RequestException, ValueError):
+            return None  # HEAD timed out, was reset or refused, or sent a bad length: use a single stream
+        part_path = file_path + '.part'
+        state_path = part_path + '.json'
+        state = self._read_part_state(state_path)
+
+        if os.path.exists(part_path) and state.get('segments') and state.get('etag') == etag and state.get('size') == size:
+            segments = state['segments']
+        elif os.path.exists(part_path) and not state.get('segments'):
+            return None  # Resume the existing single-stream part instead
+        else:
+            segment_count = min(SEGMENTED_DOWNLOAD_SEGMENTS, self.throttle.limit, max(1, size // DOWNLOAD_CHUNK_SIZE))
+            step = -(-size // segment_count)
+            segments = [[start, start, min(start + step, size) - 1] for start in range(0, size, step)]  # [start, next, end]
+            with open(part_path, 'wb') as f:
+                self.writer.preallocate(f, size)
+                f.truncate(size)  # Sparse if the filesystem can't preallocate
+
+        complete = False
+        fd = os.open(part_path, os.O_WRONLY)
+        try:
+            with ThreadPoolExecutor(max_workers=len(segments), thread_name_prefix='segment') as pool:
+                complete = all(pool.map(lambda segment: self._fetch_segment(url, fd, segment), segments))
+        finally:
+            os.close(fd)
+            if not complete:
+                with open(state_path, 'w', encoding='utf-8') as f:
+                    json.dump({'etag': etag, 'size': size, 'segments': segments}, f)
+
+        if not complete:
+            return False
+
+        self.writer.commit(file_path, part_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return True
+
+    def _fetch_segment(self, url, fd, segment):
+        """Download one [start, next, end] byte range, retrying dropped connections from where it stopped"""
+        for attempt in range(1, LARGE_FILE_RESUME_ATTEMPTS + 1):
+            if segment[1] > segment[2]:
+                return True
+            try:
+                headers = {'Range': f'bytes={segment[1]}-{segment[2]}'}
+                with self.session.get(url, headers=headers, stream=True, timeout=30) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise IOError(f'Server ignored range request (HTTP {response.status_code})')
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        if self.should_stop:
+                            return False
+                        os.pwrite(fd, chunk, segment[1])
+                        segment[1] += len(chunk)
+                return segment[1] > segment[2]
+
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                if attempt == LARGE_FILE_RESUME_ATTEMPTS or self.should_stop:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+        return False
+
     def _download_large_file(self, file, file_path):
-        """Download large files with streaming"""
+        """Download large files with streaming, resuming a .part file with Range requests.
+
+        Returns (completed, sha256): completed is True once the file is renamed into place,
+        False if stopped (the .part file is kept so the next run resumes from it). The hash is
+        computed while streaming when the body arrives in one piece, else None.
+        """
+        part_path = file_path + '.part'
+        state_path = part_path + '.json'
+        expected_size = getattr(file, 'size', None)
+        state = self._read_part_state(state_path)
+        etag = state.get('etag')
+        if state.get('segments') and os.path.exists(part_path):
+            os.remove(part_path)  # Sparse segmented part: its length says nothing about progress
+
+        digest = None
+        for attempt in range(1, LARGE_FILE_RESUME_ATTEMPTS + 1):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                if etag:
+                    headers['If-Range'] = etag  # Full body instead of a range if the file changed
+
+            try:
+                with self.session.get(file.url, headers=headers, stream=True, timeout=30) as response:
+                    if response.status_code == 416 and offset and offset == expected_size:
+                        break  # Part file already holds every byte
+                    if response.status_code == 416:
+                        os.remove(part_path)
+                        continue
+                    response.raise_for_status()
+
+                    if response.status_code != 206:
+                        offset = 0  # Server ignored the range or the file changed: start over
+                    digest = hashlib.sha256() if offset == 0 else None
+                    etag = response.headers.get('ETag')
+                    with open(state_path, 'w', encoding='utf-8') as f:
+                        json.dump({'etag': etag, 'size': expected_size}, f)
+
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if self.should_stop:
+                                return False, None
+                            f.write(chunk)
+                            if digest is not None:
+                                digest.update(chunk)
+                break
+
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == LARGE_FILE_RESUME_ATTEMPTS or self.should_stop:
+                    raise
+                resumed_at = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                self.emit_log(
+                    f'Connection lost ({str(e)}), resuming {os.path.basename(file_path)} '
+                    f'at {resumed_at / 1024 / 1024:.1f} MB',
+                    'warning'
+                )
+                digest = None  # Resumed mid-body: hash the finished file instead
+                time.sleep(min(2 ** attempt, 30))
+
+        actual_size = os.path.getsize(part_path)
+        if expected_size and actual_size != expected_size:
+            os.remove(part_path)
+            raise IOError(f'Size mismatch: expected {expected_size} bytes, got {actual_size}')
+
+        self.writer.commit(file_path, part_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return True, digest.hexdigest() if digest is not None else None
+            
+    def log_job_policy(self):
+        if self.file_filter.active:
+            self.emit_log(f'Downloading only files matching {json.dumps(self.file_filter.options())}', 'info')
+        if self.schedule != 'listing':
+            self.emit_log(f'Queued downloads run {self.schedule.replace("_", " ")}', 'info')
+
+    def passes_filters(self, work, file, folder_path):
+        """Apply the job's filters to a listed file, counting the ones left out"""
+        if self.file_filter.matches(file, os.path.relpath(folder_path, work['course_dir'])):
+            return True
+        with self.progress_lock:
+            self.filtered_files += 1
+            self.filtered_bytes += getattr(file, 'size', 0) or 0
+        return False
+
+    def download_priority(self, file):
+        """Queue priority for the job's schedule policy (lower runs first); unknown sizes go last"""
+        if self.schedule == 'listing':
+            return 0
+        size = getattr(file, 'size', None)
+        if size is None:
+            return math.inf
+        return size if self.schedule == 'smallest_first' else -size
+
+    def course_directory(self, course):
+        """Sanitized course code and the Term/Course-Code directory it downloads into"""
+        course_code = sanitize_filename(course.course_code)
+        course_term = course.term["name"].replace(' ', '-') if hasattr(course, 'term') and course.term else 'Unknown-Term'
+        return course_code, os.path.join(self.output_path, course_term, course_code)
+
+    def enumerate_course(self, course, on_item=None):
+        """List a course's files and submission attachments once into a work list.
+
+        on_item(work, file, path, attachment) is called for every item as its listing page
+        arrives, so downloads can start while the rest of the course is still being listed.
+        """
+        course_code, course_dir = self.course_directory(course)
+        work = {
+            'course': course,
+            'course_code': course_code,
+            'course_dir': course_dir,
+            'files': [],        # [(file, folder_path)]
+            'attachments': []   # [(attachment, assignment_dir)]
+        }
+
+        def found(file, path, attachment=False):
+            if not self.passes_filters(work, file, path):
+                return
+            work['attachments' if attachment else 'files'].append((file, path))
+            if on_item is not None:
+                on_item(work, file, path, attachment)
+
+        # Course files
+        try:
+            folders = [self.bind(folder) for folder in metadata_cache.get_or_load(
+                self.account, 'folders', course.id,
+                lambda: list(course.get_folders(per_page=CANVAS_PER_PAGE))
+            )]
+            self.emit_log(f'Found {len(folders)} folders in {course_code}', 'info')
+
+            listed = False
+            if FILE_LISTING_MODE == 'course':
+                try:
+                    self.list_course_files(course, folders, course_dir, found)
+                    listed = True
+                except (Unauthorized, Forbidden, ResourceDoesNotExist) as e:
+                    if work['files']:
+                        raise  # Some files were already queued: a folder listing would repeat them
+                    self.emit_log(f'Course file listing unavailable for {course_code}, listing folders instead: {str(e)}', 'info')
+
+            if not listed:
+                self.list_folder_files(folders, course_dir, found)
+                    
+        except Exception as e:
+            self.emit_log(f'Failed to access course files for {course_code}: {str(e)}', 'error')
+
+        # Assignment submission attachments (one bulk listing instead of a request per assignment)
         try:
-            response = requests.get(file.url, stream=True, timeout=30)
-            response.raise_for_status()
+            submissions = self.list_submissions(course)
+            assignment_dir = os.path.join(course_dir, 'assignments')
+            for submission in submissions:
+                for attachment in getattr(submission, 'attachments', None) or []:
+                    found(attachment, assignment_dir, attachment=True)
+            if work['attachments']:
+                self.emit_log(
+                    f'Found {len(work["attachments"])} attachments in {len(submissions)} submissions in {course_code}',
+                    'info'
+                )
+                    
+        except Exception as e:
+            self.emit_log(f'Failed to access assignments for {course_code}: {str(e)}', 'error')
+
+        return work
             
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+    def list_pages(self, endpoint, params):
+        """Raw JSON items from every page of a Canvas list endpoint.
+
+        When the first page links a numbered last page, the remaining pages are fetched in
+        parallel; otherwise (bookmark pagination) next links are followed in order.
+        """
+        requester = self.canvas._Canvas__requester
+        params = [('per_page', CANVAS_PER_PAGE), *params]
+        response = requester.request('GET', endpoint, _kwargs=params)
+        items = list(response.json())
+        last_page = page_number(response.links.get('last', {}).get('url'))
+
+        if last_page and last_page > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, last_page - 1)) as pool:
+                pages = pool.map(
+                    lambda page: requester.request('GET', endpoint, _kwargs=params + [('page', page)]).json(),
+                    range(2, last_page + 1)
+                )
+                for page in pages:
+                    items.extend(page)
+            return items
+
+        next_url = response.links.get('next', {}).get('url')
+        while next_url:
+            response = requester.request('GET', _url=next_url)
+            items.extend(response.json())
+            next_url = response.links.get('next', {}).get('url')
+        return items
+
+    def list_submissions(self, course):
+        """The user's submission for every assignment in a course, from the bulk submissions endpoint"""
+        requester = self.canvas._Canvas__requester
+        return [
+            Submission(requester, dict(data, course_id=course.id))
+            for data in self.list_pages(f'courses/{course.id}/students/submissions', [('student_ids[]', self.user.id)])
+        ]
+
+    def iterate_listing(self, kind, ident, listing):
+        """Yield a paginated listing item by item as its pages arrive, caching it once complete"""
+        items = metadata_cache.get(self.account, kind, ident)
+        if items is not None:
+            yield from items
+            return
+
+        items = []
+        for item in listing():
+            if self.should_stop:
+                return  # Partial listing: don't cache it
+            items.append(item)
+            yield item
+        metadata_cache.put(self.account, kind, ident, items)
+
+    def list_course_files(self, course, folders, course_dir, found):
+        """List all course files with one paginated /files call, mapped to folder paths by folder id"""
+        folder_paths = {
+            folder.id: os.path.join(course_dir, sanitize_filename(str(folder.name)))
+            for folder in folders
+        }
+        unfiled_path = os.path.join(course_dir, 'unfiled')
+
+        file_count = 0
+        for file in self.iterate_listing('files', course.id, lambda: course.get_files(per_page=CANVAS_PER_PAGE)):
+            found(file, folder_paths.get(getattr(file, 'folder_id', None), unfiled_path))
+            file_count += 1
+
+        self.emit_log(f'Found {file_count} files in {len(folders)} folders', 'info')
+
+    def list_folder_files(self, folders, course_dir, found):
+        """List course files folder by folder (works when the course-level listing is restricted)"""
+        for folder in folders:
+            if self.should_stop:
+                break
+                
+            try:
+                folder_name = sanitize_filename(str(folder.name))
+                folder_path = os.path.join(course_dir, folder_name)
+                
+                file_count = 0
+                for file in folder.get_files(per_page=CANVAS_PER_PAGE):
                     if self.should_stop:
                         break
-                    f.write(chunk)
+                    found(file, folder_path)
+                    file_count += 1
+                self.emit_log(f'Found {file_count} files in folder "{folder_name}"', 'info')
                     
-        except Exception as e:
-            if os.path.exists(file_path):
-                os.remove(file_path)  # Remove partial download
-            raise e
-            
-    def download_course_files(self, course, course_dir, course_code):
-        """Download all files for a course"""
+            except Exception as e:
+                self.emit_log(f'Error processing folder {folder.name}: {str(e)}', 'warning')
+                continue
+
+    def queue_download(self, futures, work, file, path, attachment):
+        """Pipeline producer: hand one discovered file to the shared download workers.
+
+        Blocks while PIPELINE_QUEUE_SIZE of the job's files are queued or downloading, so
+        listing never runs far ahead of the transfers.
+        """
+        while not self.pipeline_slots.acquire(timeout=1):
+            if self.should_stop:
+                return
+        if self.should_stop:
+            self.pipeline_slots.release()
+            return
+
+        self.target_name(file, path, attachment)  # Claim now so a lower-id collider listed later can take the name
+        with self.progress_lock:
+            self.progress['total'] += 1
+        if self.status == 'calculating':
+            self.start_downloading_phase()
+        futures.append(download_scheduler.submit(
+            self.download_id, self._download_and_advance, file, path, work['course_code'], attachment,
+            priority=self.download_priority(file)
+        ))
+
+    def start_downloading_phase(self):
+        self.enter_phase('downloading')
+        self.download_started = time.time()
+        self.emit_log(f'Starting file downloads with up to {self.max_workers} workers...', 'info')
+
+    def run_download(self):
+        """Main download process: enumeration feeds the download workers as listings arrive"""
         try:
-            folders = list(course.get_folders())
-            self.emit_log(f'Found {len(folders)} folders in {course_code}', 'info')
+            self.events.start()
+            selected_course_objects = self.select_courses()
+            if selected_course_objects is None:
+                return
+            
+            # Files are queued for download as they are listed; the total grows until listing ends
+            self.enter_phase('calculating')
+            self.emit_log('Listing files (downloads start as soon as the first ones are found)...', 'info')
+            self.log_job_policy()
+            self.progress['discovering'] = True
+            download_scheduler.register_job(self.download_id, self.host, self.throttle.limit)
+
+            course_futures = []
+            for course in selected_course_objects:
+                if self.should_stop:
+                    break
+
+                futures = []
+                try:
+                    self.emit_log(f'Processing course: {course.name}', 'info')
+                    work = self.enumerate_course(
+                        course, lambda work, file, path, attachment: self.queue_download(futures, work, file, path, attachment)
+                    )
+                    course_futures.append((work, futures))
+                except Exception as e:
+                    self.emit_log(f'Error listing files for {course.name}: {str(e)}', 'warning')
+                    continue
+
+            self.progress['discovering'] = False
+            self.emit_log(f'Found {self.progress["total"]} files across {len(selected_course_objects)} courses', 'info')
+            self.emit_progress()
+            if self.status == 'calculating':
+                self.start_downloading_phase()
             
-            for folder in folders:
+            for work, futures in course_futures:
                 if self.should_stop:
                     break
                     
+                course = work['course']
                 try:
-                    folder_name = sanitize_filename(str(folder.name))
-                    folder_path = os.path.join(course_dir, folder_name)
+                    self.wait_for_downloads(futures)
                     
-                    files = list(folder.get_files())
-                    self.emit_log(f'Processing folder "{folder_name}" with {len(files)} files', 'info')
+                    self.emit_log(f'Completed course: {work["course_code"]}', 'success')
                     
-                    for file in files:
-                        if self.should_stop:
-                            break
-                            
-                        self.download_file(file, folder_path, course_code)
-                        self.progress['current'] += 1
-                        self.emit_progress(self.progress)
-                        
                 except Exception as e:
-                    self.emit_log(f'Error processing folder {folder.name}: {str(e)}', 'warning')
+                    self.emit_log(f'Error processing course {course.name}: {str(e)}', 'error')
                     continue
-                    
+
+            self.finish_download()
+                
+        except Exception as e:
+            self.enter_phase('error')
+            self.emit_log(f'Download failed: {str(e)}', 'error')
+            
+        finally:
+            self.cleanup()
+
+    def select_courses(self):
+        """Connect and resolve the selected courses; returns None (status error) if that fails"""
+        self.enter_phase('connecting')
+        self.emit_log('Starting download process...', 'info')
+        
+        # Initialize Canvas connection
+        if not self.initialize_canvas():
+            self.enter_phase('error')
+            return None
+            
+        # Get selected courses
+        self.enter_phase('fetching_courses')
+        self.emit_log('Fetching course information...', 'info')
+        
+        selected_course_objects = self.cached_selected_courses()
+        if selected_course_objects is None:
+            all_courses = metadata_cache.get_or_load(
+                self.account, 'courses', 'all',
+                lambda: list(self.user.get_courses(include="term"))
+            )
+            selected_course_objects = [c for c in all_courses if c.id in self.selected_courses]
+        
+        if not selected_course_objects:
+            self.emit_log('No valid courses found for download', 'error')
+            self.enter_phase('error')
+            return None
+        return [self.bind(course) for course in selected_course_objects]
+
+    def collect_course_work(self, selected_course_objects):
+        """Fully enumerate the selected courses up front into their work lists"""
+        self.enter_phase('calculating')
+        self.emit_log('Calculating total files...', 'info')
+        course_work = []
+        for course in selected_course_objects:
+            if self.should_stop:
+                break
+
+            try:
+                course_work.append(self.enumerate_course(course))
+            except Exception as e:
+                self.emit_log(f'Error counting files for {course.name}: {str(e)}', 'warning')
+                continue
+
+        total_files = sum(len(work['files']) + len(work['attachments']) for work in course_work)
+        self.progress['total'] = total_files
+        self.emit_log(f'Found {total_files} files across {len(selected_course_objects)} courses', 'info')
+        return course_work
+
+    def cached_selected_courses(self):
+        """Selected courses from the /api/courses cache, or None if any are missing"""
+        cached_courses = metadata_cache.get(self.account, 'courses', 'active') or []
+        selected = [c for c in cached_courses if c.id in self.selected_courses]
+        return selected if len(selected) >= len(set(self.selected_courses)) else None
+
+    def finish_download(self):
+        """Log the job summary and set the final status"""
+        self.log_worker_throughput()
+        if self.throttle.throttled:
+            self.emit_log(f'Canvas rate limited {self.throttle.throttled} requests (retried with backoff)', 'warning')
+        if self.filtered_files:
+            self.emit_log(
+                f'Filtered out {self.filtered_files} files '
+                f'({self.filtered_bytes / 1024 / 1024:.1f} MB) by the job filters',
+                'info'
+            )
+        if self.skipped_files:
+            self.emit_log(f'Skipped {self.skipped_files} unchanged files', 'info')
+        if self.deduplicated_files:
+            self.emit_log(
+                f'Deduplicated {self.deduplicated_files} files '
+                f'({self.deduplicated_bytes / 1024 / 1024:.1f} MB stored once)',
+                'info'
+            )
+                
+        if self.should_stop:
+            self.enter_phase('stopped')
+            self.emit_log('Download stopped by user', 'warning')
+        else:
+            self.enter_phase('completed')
+            self.emit_log(f'Download completed! Downloaded {self.progress["current"]} files', 'success')
+
+    def cleanup(self):
+        """Deliver final events, persist the job and release its resources"""
+        self.writer.flush()
+        self.events.close()
+        self.emit_status()
+        self.sync_job_state(force=True)
+        download_scheduler.unregister_job(self.download_id)
+        release_file_downloads(self.client_ip, self.download_allowance)
+        self.session.close()
+        if self.manifest is not None:
+            try:
+                self.manifest.compact()
+            except OSError as e:
+                logger.warning(f"Could not compact sync manifest: {str(e)}")
+        if self.download_id in active_downloads:
+            del active_downloads[self.download_id]
+
+class AsyncLoopThread:
+    """One asyncio event loop on a daemon thread, shared by every async-backend job"""
+
+    def __init__(self):
+        self.loop = None
+        self.lock = threading.Lock()
+
+    def submit(self, coro):
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name='async-downloads', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+async_loop = AsyncLoopThread()
+
+class AsyncDownloadManager(DownloadManager):
+    """DownloadManager that enumerates and downloads with aiohttp on the shared event loop.
+
+    Each job keeps up to ASYNC_MAX_IN_FLIGHT Canvas requests in flight from a single thread
+    (fewer while the adaptive throttle is backing off). Progress/log events, the job store,
+    incremental sync, dedup and stop requests work exactly as in the threaded manager.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.throttle = AdaptiveThrottle(ASYNC_MAX_IN_FLIGHT)
+        self.api_base = self.api_url.rstrip('/') + '/api/v1'
+        self.http = None
+        self.slots = None  # asyncio.Condition guarding in_flight, created on the loop
+        self.in_flight = 0
+        self.queue_sequence = count()  # Keeps equal priorities in listing order on the download queue
+
+    def job_options(self):
+        return dict(super().job_options(), backend='async')
+
+    def start(self):
+        async_loop.submit(self.run_download_async())
+
+    @asynccontextmanager
+    async def request_slot(self, paced=True):
+        """Hold one of the job's request slots (capped by the throttle's current limit).
+
+        API requests are paced by the throttle; file transfers (paced=False) only take a slot.
+        """
+        async with self.slots:
+            await self.slots.wait_for(lambda: self.in_flight < self.throttle.recover())
+            self.in_flight += 1
+        try:
+            wait_seconds = self.throttle.delay() if paced else 0
+            if wait_seconds:
+                await asyncio.sleep(wait_seconds)
+            yield
+        finally:
+            async with self.slots:
+                self.in_flight -= 1
+                self.slots.notify_all()  # The limit may have grown by more than this one slot
+
+    async def api_request(self, url, params=None):
+        """GET a Canvas API URL with rate-limit and transient-error retries; returns (data, {rel: link url})"""
+        headers = {'Authorization': f'Bearer {self.api_key}'}
+        for attempt in range(max(RATE_LIMIT_RETRIES, HTTP_RETRIES) + 1):
+            try:
+                async with self.request_slot():
+                    started = time.time()
+                    async with self.http.get(url, params=params, headers=headers) as response:
+                        endpoint = api_endpoint_label(url)
+                        metrics.inc('canvas_api_requests_total', endpoint=endpoint, status=response.status)
+                        metrics.observe('canvas_api_request_seconds', time.time() - started, endpoint=endpoint)
+                        self.throttle.observe(response)
+                        status = response.status
+                        body = await response.text()
+                        links = {rel: str(link['url']) for rel, link in response.links.items()}
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= HTTP_RETRIES:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+
+            if status == 429 or (status == 403 and 'Rate Limit Exceeded' in body):
+                if attempt >= RATE_LIMIT_RETRIES:
+                    raise CanvasException('Rate Limit Exceeded')
+                self.throttle.record_throttled()
+                backoff = min(2 ** attempt, 60) * random.uniform(0.5, 1.5)
+                logger.warning(f"Canvas rate limit hit, retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+                continue
+            if status in (500, 502, 503, 504) and attempt < HTTP_RETRIES:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+
+            if status == 401:
+                raise Unauthorized(body)
+            if status == 403:
+                raise Forbidden(body)
+            if status == 404:
+                raise ResourceDoesNotExist('Not Found')
+            if status >= 400:
+                raise CanvasException(f'HTTP {status}: {body[:200]}')
+            return json.loads(body), links
+
+    async def api_list(self, path, params=()):
+        """Every page of a Canvas list endpoint as attribute objects (numbered pages fetched concurrently, like list_pages)"""
+        url = f'{self.api_base}/{path}'
+        query = [('per_page', CANVAS_PER_PAGE), *params]
+        page, links = await self.api_request(url, query)
+        pages = [page]
+        last_page = page_number(links.get('last'))
+
+        if last_page and last_page > 1:
+            responses = await asyncio.gather(*(
+                self.api_request(url, query + [('page', number)]) for number in range(2, last_page + 1)
+            ))
+            pages.extend(page for page, _ in responses)
+        else:
+            while links.get('next'):
+                page, links = await self.api_request(links['next'])
+                pages.append(page)
+
+        return [SimpleNamespace(**item) for page in pages for item in page]
+
+    async def cached_list(self, kind, ident, path, params=()):
+        """api_list through the metadata cache, under keys apart from the threaded manager's canvasapi objects"""
+        kind = f'{kind}:json'
+        items = metadata_cache.get(self.account, kind, ident)
+        if items is None:
+            items = await self.api_list(path, params)
+            metadata_cache.put(self.account, kind, ident, items)
+        return items
+
+    async def initialize_canvas_async(self):
+        """Look up the current user (the threaded manager's cached User works too)"""
+        try:
+            self.user = metadata_cache.get(self.account, 'user')
+            if self.user is None:
+                data, _ = await self.api_request(f'{self.api_base}/users/self')
+                self.user = SimpleNamespace(**data)
+            self.emit_log(f'Connected to Canvas as {self.user.name}', 'success')
+            return True
+        except Exception as e:
+            self.emit_log(f'Failed to connect to Canvas: {str(e)}', 'error')
+            return False
+
+    async def enumerate_course_async(self, course, queue):
+        """Async enumerate_course: the file and bulk submission listings run concurrently and each
+        one's items go onto the download queue as soon as that listing completes"""
+        course_code, course_dir = self.course_directory(course)
+        work = {
+            'course': course,
+            'course_code': course_code,
+            'course_dir': course_dir,
+            'pending': 0,    # Queued items not yet finished
+            'listed': False
+        }
+        self.emit_log(f'Processing course: {course.name} ({course_code})', 'info')
+
+        async def queue_listing(listing, attachment):
+            for file, path in await listing:
+                await self.enqueue_async(queue, work, file, path, attachment)
+
+        await asyncio.gather(
+            queue_listing(self.list_files_async(course, course_code, course_dir), False),
+            queue_listing(self.list_attachments_async(course, course_code, course_dir), True)
+        )
+        work['listed'] = True
+        self.complete_course(work)
+        return work
+
+    async def enqueue_async(self, queue, work, file, folder_path, attachment):
+        """Pipeline producer: waits while the bounded queue is full"""
+        if self.should_stop or not self.passes_filters(work, file, folder_path):
+            return
+        self.target_name(file, folder_path, attachment)  # Claim now; the worker settles it when it starts
+        item = (work, file, folder_path, attachment)
+
+        work['pending'] += 1
+        with self.progress_lock:
+            self.progress['total'] += 1
+        if self.status == 'calculating':
+            self.start_downloading_phase()
+        await queue.put((self.download_priority(file), next(self.queue_sequence), item))
+
+    def start_downloading_phase(self):
+        self.enter_phase('downloading')
+        self.download_started = time.time()
+        self.emit_log(f'Starting file downloads with up to {ASYNC_MAX_IN_FLIGHT} concurrent requests...', 'info')
+
+    def complete_course(self, work):
+        if work['listed'] and not work['pending'] and not self.should_stop:
+            self.emit_log(f'Completed course: {work["course_code"]}', 'success')
+
+    async def list_files_async(self, course, course_code, course_dir):
+        try:
+            folders = await self.cached_list('folders', course.id, f'courses/{course.id}/folders')
+            self.emit_log(f'Found {len(folders)} folders in {course_code}', 'info')
+            folder_paths = {
+                folder.id: os.path.join(course_dir, sanitize_filename(str(folder.name)))
+                for folder in folders
+            }
+
+            if FILE_LISTING_MODE == 'course':
+                try:
+                    files = await self.cached_list('files', course.id, f'courses/{course.id}/files')
+                    unfiled_path = os.path.join(course_dir, 'unfiled')
+                    self.emit_log(f'Found {len(files)} files in {len(folders)} folders', 'info')
+                    return [(file, folder_paths.get(getattr(file, 'folder_id', None), unfiled_path)) for file in files]
+                except (Unauthorized, Forbidden, ResourceDoesNotExist) as e:
+                    self.emit_log(f'Course file listing unavailable for {course_code}, listing folders instead: {str(e)}', 'info')
+
+            listings = await asyncio.gather(*(
+                self.list_folder_async(folder, folder_paths[folder.id]) for folder in folders
+            ))
+            return [entry for entries in listings for entry in entries]
+
         except Exception as e:
             self.emit_log(f'Failed to access course files for {course_code}: {str(e)}', 'error')
-            
-    def download_assignment_submissions(self, course, course_dir, course_code):
-        """Download assignment submissions for a course"""
+            return []
+
+    async def list_folder_async(self, folder, folder_path):
+        if self.should_stop:
+            return []
         try:
-            assignments = list(course.get_assignments())
+            files = await self.api_list(f'folders/{folder.id}/files')
+            self.emit_log(f'Found {len(files)} files in folder "{os.path.basename(folder_path)}"', 'info')
+            return [(file, folder_path) for file in files]
+        except Exception as e:
+            self.emit_log(f'Error processing folder {folder.name}: {str(e)}', 'warning')
+            return []
+
+    async def list_attachments_async(self, course, course_code, course_dir):
+        try:
+            submissions = await self.api_list(
+                f'courses/{course.id}/students/submissions', [('student_ids[]', self.user.id)]
+            )
             assignment_dir = os.path.join(course_dir, 'assignments')
-            
-            if not assignments:
-                return
-                
-            self.emit_log(f'Found {len(assignments)} assignments in {course_code}', 'info')
-            
-            for assignment in assignments:
-                if self.should_stop:
-                    break
-                    
-                try:
-                    submission = assignment.get_submission(self.user.id)
-                    
-                    if hasattr(submission, 'attachments') and submission.attachments:
-                        for attachment in submission.attachments:
-                            if self.should_stop:
-                                break
-                                
-                            try:
-                                attachment_name = sanitize_filename(attachment.filename)
-                                file_path = os.path.join(assignment_dir, attachment_name)
-                                
-                                if not self.should_download_file(file_path):
-                                    continue
-                                    
-                                if not self.ensure_directory(file_path):
-                                    continue
-                                    
-                                # Update progress
-                                self.progress['current_file'] = f"{course_code}/assignments/{attachment_name}"
-                                self.emit_progress(self.progress)
-                                
-                                # Download attachment
-                                response = requests.get(attachment.url, allow_redirects=True, timeout=30)
-                                response.raise_for_status()
-                                
-                                with open(file_path, 'wb') as f:
-                                    f.write(response.content)
-                                    
-                                self.emit_log(f'Downloaded assignment: {attachment_name}', 'success')
-                                self.progress['current'] += 1
-                                self.emit_progress(self.progress)
-                                
-                            except Exception as e:
-                                self.emit_log(f'Failed to download attachment {attachment.filename}: {str(e)}', 'warning')
-                                
-                except Exception as e:
-                    self.emit_log(f'Error processing assignment {assignment.name}: {str(e)}', 'warning')
-                    continue
-                    
+            attachments = [
+                (SimpleNamespace(**attachment), assignment_dir)
+                for submission in submissions
+                for attachment in getattr(submission, 'attachments', None) or []
+            ]
+            if attachments:
+                self.emit_log(
+                    f'Found {len(attachments)} attachments in {len(submissions)} submissions in {course_code}',
+                    'info'
+                )
+            return attachments
+
         except Exception as e:
             self.emit_log(f'Failed to access assignments for {course_code}: {str(e)}', 'error')
-            
-    def calculate_total_files(self, courses):
-        """Calculate total number of files to download"""
-        total = 0
-        self.emit_log('Calculating total files...', 'info')
-        
-        for course in courses:
-            if self.should_stop:
-                break
-                
+            return []
+
+    @staticmethod
+    async def blocking(fn, *args):
+        """Run disk (or other blocking) work in the loop's executor, so one slow write can't stall every job"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    @staticmethod
+    def _part_size(path):
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    @staticmethod
+    def _remove_if_exists(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def _write_part_state(state_path, state):
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    @staticmethod
+    def _write_chunk(f, chunk, digest):
+        f.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+
+    async def download_item_async(self, file, folder_path, file_name, label, kind=''):
+        """Async download_file for one file or submission attachment"""
+        full_path = os.path.join(folder_path, file_name)
+        try:
+            if not await self.blocking(self.should_download_file, full_path, file):
+                self.mark_skipped(file, full_path)
+                self.emit_log(f'Skipping unchanged file: {file_name}', 'info')
+                return
+
+            if not await self.blocking(self.ensure_directory, full_path):
+                return
+
+            if await self.blocking(self.link_stored_copy, file, full_path):
+                self.emit_log(f'Linked duplicate{kind}: {file_name}', 'success')
+                return
+
+            # The limiter may be Redis-backed
+            can_download, limit_message = await self.blocking(self.reserve_download_slot)
+            if not can_download:
+                self.emit_log(limit_message, 'error')
+                return
+
+            self.progress['current_file'] = label
+            self.emit_progress()
+
+            if not await self.transfer_file_async(file, full_path):
+                self.emit_log(f'Paused: {file_name} (will resume on next run)', 'warning')
+                return
+
+            self.emit_log(f'Downloaded{kind}: {file_name}', 'success')
+
+        except (Unauthorized, ResourceDoesNotExist) as e:
+            self.emit_log(f'Access denied for file {file_name}: {str(e)}', 'warning')
+            self.record_file_state(file, folder_path, 'failed')
+        except aiohttp.ClientResponseError as e:
+            log_type = 'warning' if e.status in (401, 403, 404) else 'error'
+            self.emit_log(f'Failed to download {file_name}: {e.status} {e.message}', log_type)
+            self.record_file_state(file, folder_path, 'failed')
+        except Exception as e:
+            self.emit_log(f'Failed to download {file_name}: {str(e)}', 'error')
+            self.record_file_state(file, folder_path, 'failed')
+
+    async def transfer_file_async(self, file, full_path):
+        """Async transfer_file; hashing and manifest/blob bookkeeping run in the executor"""
+        started = time.time()
+        completed, content_hash = await self._stream_file_async(file, full_path)
+        if not completed:
+            return False
+        self.record_worker_stats(getattr(file, 'size', 0) or 0, time.time() - started)
+        await self.blocking(self.record_download, file, full_path, content_hash)
+        return True
+
+    async def _stream_file_async(self, file, file_path):
+        """Stream a file through a .part file, resuming with Range requests after dropped connections.
+
+        Returns (completed, sha256). The hash is computed while streaming when the body arrives
+        in one piece, else None. Large files keep their .part file when stopped, like
+        _download_large_file, so the next run resumes them. Only the network reads run on the
+        loop; every write, rename and stat goes through the executor.
+        """
+        part_path = file_path + '.part'
+        state_path = part_path + '.json'
+        expected_size = getattr(file, 'size', None)
+        resumable = bool(expected_size and expected_size > 100000000)  # 100MB
+        state = await self.blocking(self._read_part_state, state_path) if resumable else {}
+        etag = state.get('etag')
+        if state.get('segments') or not resumable:
+            await self.blocking(self._remove_if_exists, part_path)  # Segmented or abandoned part: start clean
+
+        digest = None
+        stopped = False
+        for attempt in range(1, LARGE_FILE_RESUME_ATTEMPTS + 1):
+            offset = await self.blocking(self._part_size, part_path)
+            headers = {}
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                if etag:
+                    headers['If-Range'] = etag
+
             try:
-                # Count course files
-                folders = list(course.get_folders())
-                for folder in folders:
-                    try:
-                        files = list(folder.get_files())
-                        total += len(files)
-                    except:
-                        continue
-                        
-                # Count assignment attachments
-                try:
-                    assignments = list(course.get_assignments())
-                    for assignment in assignments:
-                        try:
-                            submission = assignment.get_submission(self.user.id)
-                            if hasattr(submission, 'attachments') and submission.attachments:
-                                total += len(submission.attachments)
-                        except:
+                async with self.request_slot(paced=False):
+                    started = time.time()
+                    async with self.http.get(file.url, headers=headers) as response:
+                        metrics.inc('canvas_api_requests_total', endpoint='file', status=response.status)
+                        metrics.observe('canvas_api_request_seconds', time.time() - started, endpoint='file')
+                        if response.status == 416 and offset and offset == expected_size:
+                            break
+                        if response.status == 416:
+                            await self.blocking(os.remove, part_path)
                             continue
-                except:
-                    continue
-                    
-            except Exception as e:
-                self.emit_log(f'Error counting files for {course.course_code}: {str(e)}', 'warning')
-                continue
-                
-        return total
-        
-    def run_download(self):
-        """Main download process"""
+                        response.raise_for_status()
+
+                        if response.status != 206:
+                            offset = 0
+                        digest = hashlib.sha256() if offset == 0 else None
+                        etag = response.headers.get('ETag')
+                        if resumable:
+                            await self.blocking(self._write_part_state, state_path, {'etag': etag, 'size': expected_size})
+
+                        f = await self.blocking(open, part_path, 'ab' if offset else 'wb')
+                        try:
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                if self.should_stop:
+                                    stopped = True
+                                    break
+                                await self.blocking(self._write_chunk, f, chunk, digest)
+                        finally:
+                            await self.blocking(f.close)
+                break
+
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == LARGE_FILE_RESUME_ATTEMPTS or self.should_stop:
+                    if not resumable:
+                        await self.blocking(self._remove_if_exists, part_path)
+                    raise
+                resumed_at = await self.blocking(self._part_size, part_path)
+                self.emit_log(
+                    f'Connection lost ({str(e) or type(e).__name__}), resuming {os.path.basename(file_path)} '
+                    f'at {resumed_at / 1024 / 1024:.1f} MB',
+                    'warning'
+                )
+                digest = None
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+        if stopped:
+            if not resumable:
+                await self.blocking(os.remove, part_path)  # Remove partial download
+            return False, None
+
+        actual_size = await self.blocking(os.path.getsize, part_path)
+        if expected_size and actual_size != expected_size:
+            await self.blocking(os.remove, part_path)
+            raise IOError(f'Size mismatch: expected {expected_size} bytes, got {actual_size}')
+
+        await self.blocking(self.writer.commit, file_path, part_path)
+        await self.blocking(self._remove_if_exists, state_path)
+        return True, digest.hexdigest() if digest is not None else None
+
+    async def download_worker(self, queue):
+        """Pipeline consumer: download queued items until the None sentinel.
+
+        After a stop, items are drained without downloading so producers never block on a
+        full queue.
+        """
+        while True:
+            _, _, item = await queue.get()
+            if item is None:
+                return
+            work, file, folder_path, attachment = item
+            try:
+                if not self.should_stop:
+                    file_name = self.target_name(file, folder_path, attachment, settle=True)
+                    if attachment:
+                        label, kind = f'{work["course_code"]}/assignments/{file_name}', ' assignment'
+                    else:
+                        label, kind = f'{work["course_code"]}/{file_name}', ''
+                    await self.download_item_async(file, folder_path, file_name, label, kind)
+            finally:
+                self.advance_progress()
+                work['pending'] -= 1
+                self.complete_course(work)
+
+    async def run_download_async(self):
+        """Main download process on the event loop (same phases and events as run_download)"""
+        workers = []
         try:
-            self.status = 'connecting'
+            self.events.start()
+            self.slots = asyncio.Condition()
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=ASYNC_MAX_IN_FLIGHT),
+                timeout=aiohttp.ClientTimeout(sock_connect=30, sock_read=30)
+            )
+            self.enter_phase('connecting')
             self.emit_log('Starting download process...', 'info')
-            
-            # Initialize Canvas connection
-            if not self.initialize_canvas():
-                self.status = 'error'
+
+            if not await self.initialize_canvas_async():
+                self.enter_phase('error')
                 return
-                
-            # Get selected courses
-            self.status = 'fetching_courses'
+
+            self.enter_phase('fetching_courses')
             self.emit_log('Fetching course information...', 'info')
-            
-            all_courses = list(self.user.get_courses(include="term"))
-            selected_course_objects = [c for c in all_courses if c.id in self.selected_courses]
-            
+
+            selected_course_objects = self.cached_selected_courses()
+            if selected_course_objects is None:
+                all_courses = await self.cached_list('courses', 'all', 'courses', [('include[]', 'term')])
+                selected_course_objects = [c for c in all_courses if c.id in self.selected_courses]
+
             if not selected_course_objects:
                 self.emit_log('No valid courses found for download', 'error')
-                self.status = 'error'
+                self.enter_phase('error')
                 return
-                
-            # Calculate total files
-            self.status = 'calculating'
-            total_files = self.calculate_total_files(selected_course_objects)
-            self.progress['total'] = total_files
-            self.emit_log(f'Found {total_files} files across {len(selected_course_objects)} courses', 'info')
-            
-            # Start downloading
-            self.status = 'downloading'
-            self.emit_log('Starting file downloads...', 'info')
-            
-            for course in selected_course_objects:
-                if self.should_stop:
-                    break
-                    
-                try:
-                    course_code = sanitize_filename(course.course_code)
-                    course_term = course.term["name"].replace(' ', '-') if hasattr(course, 'term') and course.term else 'Unknown-Term'
-                    course_dir = os.path.join(self.output_path, course_term, course_code)
-                    
-                    self.emit_log(f'Processing course: {course.name} ({course_code})', 'info')
-                    
-                    # Download course files
-                    self.download_course_files(course, course_dir, course_code)
-                    
-                    # Download assignment submissions
-                    self.download_assignment_submissions(course, course_dir, course_code)
-                    
-                    self.emit_log(f'Completed course: {course_code}', 'success')
-                    
-                except Exception as e:
-                    self.emit_log(f'Error processing course {course.name}: {str(e)}', 'error')
-                    continue
-                    
-            # Finish
-            if self.should_stop:
-                self.status = 'stopped'
-                self.emit_log('Download stopped by user', 'warning')
-            else:
-                self.status = 'completed'
-                self.emit_log(f'Download completed! Downloaded {self.progress["current"]} files', 'success')
-                
+
+            # Workers consume the bounded queue while the courses are still being listed
+            self.enter_phase('calculating')
+            self.emit_log('Listing files (downloads start as soon as the first ones are found)...', 'info')
+            self.log_job_policy()
+            self.progress['discovering'] = True
+            queue = asyncio.PriorityQueue(maxsize=PIPELINE_QUEUE_SIZE)
+            workers = [asyncio.ensure_future(self.download_worker(queue)) for _ in range(ASYNC_MAX_IN_FLIGHT)]
+
+            results = await asyncio.gather(
+                *(self.enumerate_course_async(course, queue) for course in selected_course_objects),
+                return_exceptions=True
+            )
+            for course, result in zip(selected_course_objects, results):
+                if isinstance(result, Exception):
+                    self.emit_log(f'Error listing files for {course.name}: {str(result)}', 'warning')
+
+            self.progress['discovering'] = False
+            self.emit_log(f'Found {self.progress["total"]} files across {len(selected_course_objects)} courses', 'info')
+            self.emit_progress()
+            if self.status == 'calculating':
+                self.start_downloading_phase()
+
+            for _ in workers:
+                await queue.put((math.inf, next(self.queue_sequence), None))  # Sorts after every real item
+            await asyncio.gather(*workers)
+
+            self.finish_download()
+
         except Exception as e:
-            self.status = 'error'
+            self.enter_phase('error')
             self.emit_log(f'Download failed: {str(e)}', 'error')
-            
+
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if self.http is not None:
+                await self.http.close()
+            # Joins the event batcher and writes the job store: keep it off the shared loop
+            await self.blocking(self.cleanup)
+
+class ZipStreamBuffer:
+    """Write-only file object that collects zipfile output until the response generator drains it"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+class ZipExportManager(DownloadManager):
+    """Streams the selected courses as a ZIP straight from Canvas into the HTTP response.
+
+    Uses the same Term/Course-Code/folder layout as run_download. Files are stored
+    uncompressed and written chunk by chunk, so memory stays at about one
+    DOWNLOAD_CHUNK_SIZE and nothing touches the server's disk. Each chunk is yielded to the
+    client before the next is read, so a slow client also slows the Canvas reads.
+    """
+
+    def __init__(self, export_id, api_url, api_key, selected_courses, socket_id, client_ip, filters=None,
+                 schedule=SCHEDULE_POLICY):
+        # Without a socket, events go to a room nobody joins rather than broadcasting
+        super().__init__(export_id, api_url, api_key, '', selected_courses, socket_id or f'export-{export_id}',
+                         client_ip, dedup=False, filters=filters, schedule=schedule)
+        self.manifest = None
+        self.failed_entries = []
+        self.selected_course_objects = None
+
+    def prepare(self):
+        """Connect and resolve the selected courses before any response bytes are sent.
+
+        Returns None when the export can start, else (message, HTTP status) for a JSON error,
+        so bad credentials or an empty selection don't become an empty 200 archive.
+        """
+        try:
+            self.selected_course_objects = self.select_courses()
+            if self.selected_course_objects is not None:
+                return None
+            error = self.connection_error
+        except Exception as e:
+            self.enter_phase('error')
+            self.emit_log(f'Export failed: {str(e)}', 'error')
+            error = e
+        self.cleanup()
+
+        if isinstance(error, Unauthorized):
+            return 'Invalid Canvas API credentials', 401
+        if isinstance(error, CanvasException):
+            return f'Canvas API error: {str(error)}', 500
+        if error is not None:
+            return f'Failed to connect to Canvas: {str(error)}', 500
+        return 'No valid courses found for export', 400
+
+    def record_file_state(self, file, path, state):
+        metrics.inc('download_files_total', outcome=state)  # Exports are not kept in the job store
+
+    def sync_job_state(self, force=False):
+        pass
+
+    def should_download_file(self, file_path, file=None):
+        return True
+
+    @staticmethod
+    def zip_date_time(file):
+        try:
+            return datetime.strptime(file.updated_at[:19], '%Y-%m-%dT%H:%M:%S').timetuple()[:6]
+        except (AttributeError, TypeError, ValueError):
+            return time.localtime()[:6]
+
+    def stream_zip(self):
+        """Response body generator: yields the archive as it is built (call prepare() first)"""
+        output = ZipStreamBuffer()
+        try:
+            active_downloads[self.download_id] = self  # Lets /stop and /status find the export
+            self.events.start()
+            self.log_job_policy()
+            course_work = self.collect_course_work(self.selected_course_objects)
+
+            self.enter_phase('downloading')
+            self.download_started = time.time()
+            with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for work in course_work:
+                    if self.should_stop:
+                        break
+
+                    self.emit_log(f'Exporting course: {work["course"].name} ({work["course_code"]})', 'info')
+                    entries = [(file, path, False) for file, path in work['files']]
+                    entries += [(attachment, path, True) for attachment, path in work['attachments']]
+                    for file, folder_path, attachment in entries:
+                        self.target_name(file, folder_path, attachment)  # Resolve collisions across the whole course first
+                    if self.schedule != 'listing':
+                        entries.sort(key=lambda entry: self.download_priority(entry[0]))
+                    for file, folder_path, attachment in entries:
+                        if self.should_stop:
+                            break
+                        try:
+                            yield from self.stream_entry(archive, output, file, folder_path, work['course_code'], attachment)
+                        except Exception as e:
+                            self.emit_log(f'Failed to export {getattr(file, "filename", file.id)}: {str(e)}', 'error')
+                            self.record_file_state(file, folder_path, 'failed')
+                            self.failed_entries.append(f'{os.path.join(folder_path, str(getattr(file, "filename", file.id)))}: {str(e)}')
+                        self.advance_progress()
+
+                if self.failed_entries:
+                    # Bytes already sent can't be taken back: list incomplete or missing files in the archive
+                    archive.writestr('export_errors.txt', '\n'.join(self.failed_entries) + '\n')
+
+            yield output.drain()  # Central directory
+            self.finish_download()
+
+        except GeneratorExit:
+            # Client went away mid-stream
+            self.should_stop = True
+            self.enter_phase('stopped')
+            self.emit_log('Export cancelled: client disconnected', 'warning')
+            raise
+        except Exception as e:
+            self.enter_phase('error')
+            self.emit_log(f'Export failed: {str(e)}', 'error')
         finally:
-            # Cleanup
-            if self.download_id in active_downloads:
-                del active_downloads[self.download_id]
+            self.cleanup()
+
+    def stream_entry(self, archive, output, file, folder_path, course_code, attachment):
+        """Copy one Canvas file into a new archive entry, yielding archive bytes chunk by chunk"""
+        file_name = self.target_name(file, folder_path, attachment, settle=True)
+        label = f'{course_code}/assignments/{file_name}' if attachment else f'{course_code}/{file_name}'
+
+        can_download, limit_message = self.reserve_download_slot()
+        if not can_download:
+            raise IOError(limit_message)
+
+        self.progress['current_file'] = label
+        self.emit_progress()
+
+        # Open the transfer before creating the entry so request errors leave no empty entry behind
+        started = time.time()
+        response = self.session.get(file.url, stream=True, allow_redirects=True, timeout=30)
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+
+        info = zipfile.ZipInfo(os.path.join(folder_path, file_name), self.zip_date_time(file))
+        info.compress_type = zipfile.ZIP_STORED
+        size = getattr(file, 'size', None)
+        written = 0
+        with archive.open(info, 'w', force_zip64=not size or size >= zipfile.ZIP64_LIMIT) as entry:
+            for attempt in range(1, LARGE_FILE_RESUME_ATTEMPTS + 1):
+                try:
+                    with response:
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if self.should_stop:
+                                # The entry is closed as it stands: list it like any other incomplete file
+                                self.failed_entries.append(f'{info.filename}: export stopped before the file was complete')
+                                return
+                            entry.write(chunk)
+                            written += len(chunk)
+                            data = output.drain()
+                            if data:
+                                yield data
+                    break
+
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    if attempt == LARGE_FILE_RESUME_ATTEMPTS or self.should_stop:
+                        raise
+                    self.emit_log(f'Connection lost ({str(e)}), resuming {file_name} at {written / 1024 / 1024:.1f} MB', 'warning')
+                    time.sleep(min(2 ** attempt, 30))
+                    headers = {'Range': f'bytes={written}-'}
+                    if etag:
+                        headers['If-Range'] = etag
+                    response = self.session.get(file.url, headers=headers, stream=True, timeout=30)
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        response.close()
+                        raise IOError('File changed on Canvas mid-export; archive entry is incomplete')
+
+        if size and written != size:
+            raise IOError(f'Size mismatch: expected {size} bytes, got {written}; archive entry is incomplete')
+        self.record_worker_stats(written, time.time() - started)
+        self.record_file_state(file, folder_path, 'downloaded')
+        self.emit_log(f'Exported: {label}', 'success')
+        data = output.drain()
+        if data:
+            yield data
 
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+def count_course_files(account, course):
+    """Exact folder count, file count and total bytes for a course, from cached listings"""
+    folders = [bind_requester(folder, course._requester) for folder in metadata_cache.get_or_load(
+        account, 'folders', course.id,
+        lambda: list(course.get_folders(per_page=CANVAS_PER_PAGE))
+    )]
+    try:
+        files = metadata_cache.get_or_load(
+            account, 'files', course.id,
+            lambda: list(course.get_files(per_page=CANVAS_PER_PAGE))
+        )
+    except (Unauthorized, Forbidden, ResourceDoesNotExist):
+        # Course-level listing restricted: count folder by folder
+        files = []
+        for folder in folders:
+            try:
+                files.extend(folder.get_files(per_page=CANVAS_PER_PAGE))
+            except CanvasException:
+                continue
+
+    return {
+        'folder_count': len(folders),
+        'file_count': len(files),
+        'total_bytes': sum(getattr(file, 'size', 0) or 0 for file in files)
+    }
+
+def course_stats_result(future, course_name):
+    """Turn a finished count_course_files future into course_data fields"""
+    try:
+        return dict(future.result(), counts_pending=False)
+    except Exception as e:
+        logger.warning(f"Could not count folders/files for course {course_name}: {str(e)}")
+        return {'folder_count': None, 'file_count': None, 'total_bytes': None, 'counts_pending': False}
+
+def close_when_done(session, futures):
+    """Close a session once every future still using it has finished"""
+    pending = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            pending[0] -= 1
+            last = pending[0] == 0
+        if last:
+            session.close()
+
+    if not futures:
+        session.close()
+    for future in futures:
+        future.add_done_callback(done)
+
+@app.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def prometheus_metrics():
+    """Prometheus text exposition of API, transfer, queue and job metrics for this process"""
+    scheduler = download_scheduler.stats()
+    metrics.set('download_queue_depth', sum(job['queued'] for job in scheduler['jobs'].values()))
+    metrics.set('download_tasks_running', sum(job['running'] for job in scheduler['jobs'].values()))
+    metrics.reset('download_jobs_active')
+    statuses = {}
+    for manager in list(active_downloads.values()):
+        statuses[manager.status] = statuses.get(manager.status, 0) + 1
+    for status, jobs in statuses.items():
+        metrics.set('download_jobs_active', jobs, status=status)
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(metadata_cache.stats())
+
 @app.route('/api/courses', methods=['POST'])
 @limiter.limit("3 per minute")
 def get_courses():
+    session = None
+    stats_futures = {}
     try:
         data = request.json
         api_url = data.get('apiUrl')
@@ -517,11 +3135,15 @@ def get_courses():
             return jsonify({'error': 'API URL and API key are required'}), 400
 
         emit_log_to_client(f"Initializing Canvas API connection to {api_url}", 'info', socket_id)
-        # Initialize Canvas
+        # Initialize Canvas on a pooled, rate-limit aware session (same adapter and metrics as download jobs)
         canvas = Canvas(api_url, api_key)
+        session = create_http_session(COURSE_STATS_WORKERS, throttle=AdaptiveThrottle(COURSE_STATS_WORKERS))
+        canvas._Canvas__requester._session = session
+        account = MetadataCache.account_key(api_url, api_key)
 
         emit_log_to_client("Fetching current user information from Canvas", 'info', socket_id)
-        user = canvas.get_current_user()
+        requester = canvas._Canvas__requester
+        user = bind_requester(metadata_cache.get_or_load(account, 'user', None, canvas.get_current_user), requester)
         emit_log_to_client(f"Successfully authenticated as user: {user.name}", 'success', socket_id)
 
         # Emit user info immediately to update connection status
@@ -534,10 +3156,11 @@ def get_courses():
 
         emit_log_to_client("Fetching user's courses from Canvas API...", 'info', socket_id)
         # Get courses with additional includes
-        courses = list(user.get_courses(
+        courses = metadata_cache.get_or_load(account, 'courses', 'active', lambda: list(user.get_courses(
             include=["term", "course_progress", "storage_quota_used_mb", "total_students"],
             enrollment_status='active'
-        ))
+        )))
+        courses = [bind_requester(course, requester) for course in courses]
         emit_log_to_client(f"Retrieved {len(courses)} active courses from Canvas", 'success', socket_id)
 
         # Check course processing rate limit
@@ -547,6 +3170,13 @@ def get_courses():
             emit_log_to_client(limit_message, 'error', socket_id)
             return jsonify({'error': limit_message}), 429
 
+        # Count files concurrently; counts not ready within the time budget are sent later over the socket
+        stats_futures = {
+            course.id: course_stats_executor.submit(count_course_files, account, course)
+            for course in courses
+        }
+        wait(list(stats_futures.values()), timeout=COURSE_STATS_TIME_BUDGET)
+
         # Format courses for frontend
         course_list = []
         total_courses = len(courses)
@@ -574,50 +3204,30 @@ def get_courses():
                     else:
                         term_info = {'name': getattr(course.term, 'name', 'Unknown Term')}
                 
-                # Get folder and file counts (simplified for performance)
-                folder_count = 0
-                file_count = 0
-                
-                try:
-                    # Try to get a rough count of folders and files
-                    folders = list(course.get_folders())
-                    folder_count = len(folders)
-                    
-                    # Sample first few folders for file count estimate
-                    sample_folders = folders[:3] if len(folders) > 3 else folders
-                    sample_file_count = 0
-                    
-                    for folder in sample_folders:
-                        try:
-                            files = list(folder.get_files())
-                            sample_file_count += len(files)
-                        except Exception as e:
-                            logger.warning(f"Could not count files in folder {folder}: {str(e)}")
-                            continue
-                    
-                    # Estimate total files based on sample
-                    if len(folders) > 0 and len(sample_folders) > 0:
-                        file_count = int(sample_file_count * (len(folders) / len(sample_folders)))
-                    else:
-                        file_count = sample_file_count
-                        
-                    # Ensure minimum count for UI
-                    file_count = max(file_count, 1)
-                    
-                except Exception as e:
-                    logger.warning(f"Could not count folders/files for course {course_name}: {str(e)}")
-                    # Use default estimates
-                    folder_count = 5
-                    file_count = 20
-                
                 course_data = {
                     'id': getattr(course, 'id', 0),
                     'name': course_name,
                     'course_code': course_code,
                     'term': term_info,
-                    'folder_count': folder_count,
-                    'file_count': file_count
+                    'folder_count': None,
+                    'file_count': None,
+                    'total_bytes': None,
+                    'counts_pending': False
                 }
+
+                future = stats_futures[course.id]
+                if future.done():
+                    course_data.update(course_stats_result(future, course_name))
+                else:
+                    course_data['counts_pending'] = True
+                    if socket_id:
+                        future.add_done_callback(
+                            lambda f, course_id=course.id, name=course_name: socketio.emit(
+                                'course_fetch_progress',
+                                dict(course_stats_result(f, name), course_id=course_id),
+                                room=socket_id
+                            )
+                        )
                 course_list.append(course_data)
                 
                 logger.info(f"Processed course: {course_name} ({course_code})")
@@ -647,6 +3257,39 @@ def get_courses():
     except Exception as e:
         emit_log_to_client(f"Error fetching courses: {str(e)}", 'error', socket_id)
         return jsonify({'error': f'Failed to fetch courses: {str(e)}'}), 500
+    finally:
+        if session is not None:
+            close_when_done(session, list(stats_futures.values()))  # Late file counts still use it
+
+def download_manager_class(backend):
+    """Manager class for a download backend name; returns (class, error message)"""
+    if backend == 'threads':
+        return DownloadManager, None
+    if backend == 'async':
+        if aiohttp is None:
+            return None, 'The async download backend requires the aiohttp package'
+        return AsyncDownloadManager, None
+    return None, "backend must be 'threads' or 'async'"
+
+SCHEDULE_POLICIES = ('listing', 'smallest_first', 'largest_first')
+
+def job_policy_options(data):
+    """The request's filters and schedule as manager keyword arguments; returns (options, error message)"""
+    filters = data.get('filters')
+    if isinstance(filters, str):  # Form posts carry the filters object as JSON text
+        try:
+            filters = json.loads(filters) if filters.strip() else None
+        except ValueError:
+            return None, 'filters must be a JSON object'
+    try:
+        FileFilter.from_options(filters)
+    except ValueError as e:
+        return None, str(e)
+
+    schedule = data.get('schedule') or SCHEDULE_POLICY
+    if schedule not in SCHEDULE_POLICIES:
+        return None, "schedule must be 'listing', 'smallest_first' or 'largest_first'"
+    return {'filters': filters, 'schedule': schedule}, None
 
 @app.route('/api/download/start', methods=['POST'])
 @limiter.limit("3 per minute")  # Limit download initiation
@@ -658,26 +3301,40 @@ def start_download():
         output_path = data.get('outputPath', './downloads')
         selected_courses = data.get('selectedCourses', [])
         socket_id = data.get('socketId')
+        max_workers = data.get('maxWorkers', DOWNLOAD_WORKERS)
+        dedup = bool(data.get('dedup', DEDUP_MODE))
+        backend = data.get('backend', DOWNLOAD_BACKEND)
         
         if not all([api_url, api_key, selected_courses, socket_id]):
             return jsonify({'error': 'Missing required parameters'}), 400
+
+        if not isinstance(max_workers, int) or max_workers < 1:
+            return jsonify({'error': 'maxWorkers must be a positive integer'}), 400
+
+        manager_class, backend_error = download_manager_class(backend)
+        if backend_error:
+            return jsonify({'error': backend_error}), 400
+
+        policy, policy_error = job_policy_options(data)
+        if policy_error:
+            return jsonify({'error': policy_error}), 400
             
         # Generate download ID
         download_id = str(uuid.uuid4())
         
         # Create download manager
         client_ip = get_remote_address()
-        download_manager = DownloadManager(
-            download_id, api_url, api_key, output_path, selected_courses, socket_id, client_ip
+        download_manager = manager_class(
+            download_id, api_url, api_key, output_path, selected_courses, socket_id, client_ip,
+            max_workers=max_workers, dedup=dedup, **policy
         )
         
-        # Store in active downloads
+        # Store in active downloads and the durable job store
         active_downloads[download_id] = download_manager
+        job_store.create_job(download_manager)
         
-        # Start download in background thread
-        thread = threading.Thread(target=download_manager.run_download)
-        thread.daemon = True
-        thread.start()
+        # Start download in the background
+        download_manager.start()
         
         return jsonify({
             'download_id': download_id,
@@ -688,14 +3345,108 @@ def start_download():
         logger.error(f"Error starting download: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export/zip', methods=['POST'])
+@limiter.limit("3 per minute")
+def export_zip():
+    """Stream the selected courses as a ZIP download without writing them to server disk"""
+    try:
+        # JSON for API clients; a plain form POST lets browsers save the stream natively
+        data = request.get_json(silent=True)
+        if data is None:
+            data = dict(request.form, selectedCourses=request.form.getlist('selectedCourses'))
+        api_url = data.get('apiUrl')
+        api_key = data.get('apiKey')
+        socket_id = data.get('socketId')
+        try:
+            selected_courses = [int(course_id) for course_id in data.get('selectedCourses') or []]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'selectedCourses must be course ids'}), 400
+
+        if not all([api_url, api_key, selected_courses]):
+            return jsonify({'error': 'Missing required parameters'}), 400
+
+        policy, policy_error = job_policy_options(data)
+        if policy_error:
+            return jsonify({'error': policy_error}), 400
+
+        export_id = str(uuid.uuid4())
+        manager = ZipExportManager(export_id, api_url, api_key, selected_courses, socket_id, get_remote_address(), **policy)
+        failure = manager.prepare()
+        if failure:
+            message, status = failure
+            return jsonify({'error': message}), status
+        return Response(
+            manager.stream_zip(),
+            mimetype='application/zip',
+            direct_passthrough=True,
+            headers={
+                'Content-Disposition': f'attachment; filename="canvas-export-{datetime.now():%Y%m%d-%H%M%S}.zip"',
+                'X-Download-Id': export_id
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error starting export: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/download/<download_id>/resume', methods=['POST'])
+@limiter.limit("3 per minute")
+def resume_download(download_id):
+    """Restart an interrupted, stopped or failed job, skipping files it already finished"""
+    try:
+        data = request.json
+        api_key = data.get('apiKey')
+        socket_id = data.get('socketId')
+
+        if not all([api_key, socket_id]):
+            return jsonify({'error': 'Missing required parameters'}), 400
+
+        job = job_store.get_job(download_id)
+        if job is None:
+            return jsonify({'error': 'Download not found'}), 404
+        if download_id in active_downloads or job['status'] not in JobStore.RESUMABLE_STATUSES:
+            return jsonify({'error': f"Download is {job['status']} and cannot be resumed"}), 409
+        if MetadataCache.account_key(job['api_url'], api_key)[1] != job['account_hash']:
+            return jsonify({'error': 'API key does not match this download'}), 403
+
+        options = dict(job['options'])
+        manager_class, backend_error = download_manager_class(options.pop('backend', 'threads'))
+        if backend_error:
+            return jsonify({'error': backend_error}), 400
+
+        download_manager = manager_class(
+            download_id, job['api_url'], api_key, job['output_path'], job['selected_courses'], socket_id,
+            get_remote_address(), **options
+        )
+        download_manager.completed_file_ids = job_store.completed_file_ids(download_id)
+        job_store.clear_stop(download_id)
+        active_downloads[download_id] = download_manager
+        job_store.create_job(download_manager)
+        download_manager.start()
+
+        return jsonify({
+            'download_id': download_id,
+            'status': 'resumed',
+            'completed_files': len(download_manager.completed_file_ids)
+        })
+
+    except Exception as e:
+        logger.error(f"Error resuming download: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/download/<download_id>/stop', methods=['POST'])
 def stop_download(download_id):
     try:
         if download_id in active_downloads:
             active_downloads[download_id].should_stop = True
             return jsonify({'status': 'stopping'})
-        else:
-            return jsonify({'error': 'Download not found'}), 404
+
+        # Job may be running in another server process: it picks the flag up on its next heartbeat
+        job = job_store.get_job(download_id)
+        if job and job['status'] in JobStore.ACTIVE_STATUSES:
+            job_store.request_stop(download_id)
+            return jsonify({'status': 'stopping'})
+        return jsonify({'error': 'Download not found'}), 404
             
     except Exception as e:
         logger.error(f"Error stopping download: {str(e)}")
@@ -706,13 +3457,40 @@ def get_download_status(download_id):
     try:
         if download_id in active_downloads:
             manager = active_downloads[download_id]
+            since = request.args.get('since', type=int)
+            if since is None:
+                return jsonify({
+                    'status': manager.status,
+                    'progress': manager.progress_snapshot(),
+                    'phases': manager.phase_report(),
+                    'logs': manager.logs.tail(10)  # Last 10 log entries
+                })
+
+            # Cursor paging: entries after ?since=<seq>, up to ?limit=
+            limit = min(request.args.get('limit', 100, type=int), LOG_BUFFER_SIZE)
+            logs, cursor, missed = manager.logs.since(since, limit)
             return jsonify({
                 'status': manager.status,
-                'progress': manager.progress,
-                'logs': manager.logs[-10:]  # Last 10 log entries
+                'progress': manager.progress_snapshot(),
+                'phases': manager.phase_report(),
+                'logs': logs,
+                'cursor': cursor,
+                'missed': missed
             })
-        else:
+
+        # Finished, interrupted, or owned by another server process
+        job = job_store.get_job(download_id)
+        if job is None:
             return jsonify({'error': 'Download not found'}), 404
+        logs = job['logs'] or []
+        since = request.args.get('since', type=int)
+        return jsonify({
+            'status': job['status'],
+            'progress': job['progress'] or {'current': 0, 'total': 0, 'current_file': ''},
+            'stats': job['stats'],
+            'phases': (job['stats'] or {}).get('phase_seconds', {}),
+            'logs': [entry for entry in logs if entry['seq'] > since] if since is not None else logs[-10:]
+        })
             
     except Exception as e:
         logger.error(f"Error getting download status: {str(e)}")
@@ -735,7 +3513,7 @@ def handle_join_download(data):
     if download_id and download_id in active_downloads:
         # Send current status
         manager = active_downloads[download_id]
-        emit('download_progress', manager.progress)
+        emit('download_progress', manager.progress_snapshot())
         emit('download_status', {'status': manager.status})
 
 @socketio.on('test_connection')
@@ -0,0 +1,443 @@
+"""Offline benchmark for the download pipeline.
+
+Starts a mock Canvas server in a child process (courses, folders, paginated files,
+submissions, rate-limit headers, Range support, simulated latency and bandwidth), runs
+real download jobs against it through DownloadManager / AsyncDownloadManager and prints
+one JSON document with the results:
+
+    python server/benchmark.py --courses 4 --files-per-course 200 --jobs 2 --output bench.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qsl
+
+SCHEMA_VERSION = 1
+BLOCK = bytes(range(256)) * 256  # 64KB pattern that file bodies are cut from
+
+
+class MockCanvas:
+    """In-memory Canvas data set: courses, folders, files and submission attachments"""
+
+    def __init__(self, options):
+        self.courses = []
+        self.folders = {}      # {course_id: [folder]}
+        self.files = {}        # {file_id: file}
+        self.course_files = {} # {course_id: [file]}
+        self.folder_files = {} # {folder_id: [file]}
+        self.submissions = {}  # {course_id: [submission]}
+        self.base_url = ''
+
+        next_id = iter(range(1, 10 ** 9))
+        updated_at = '2024-01-01T00:00:00Z'
+        for c in range(options.courses):
+            course_id = next(next_id)
+            self.courses.append({
+                'id': course_id,
+                'name': f'Benchmark Course {c + 1}',
+                'course_code': f'BENCH{c + 1:03d}',
+                'term': {'name': 'Benchmark Term'}
+            })
+            folders = [{'id': next(next_id), 'name': f'Folder {f + 1}', 'full_name': f'course files/Folder {f + 1}'}
+                       for f in range(options.folders_per_course)]
+            self.folders[course_id] = folders
+            self.course_files[course_id] = []
+            for folder in folders:
+                self.folder_files[folder['id']] = []
+
+            for index in range(options.files_per_course):
+                large = index < options.large_files_per_course
+                folder = folders[index % len(folders)]
+                file = self.make_file(next(next_id), f'file_{index + 1}.bin',
+                                      options.large_file_size if large else options.file_size, updated_at)
+                file['folder_id'] = folder['id']
+                self.course_files[course_id].append(file)
+                self.folder_files[folder['id']].append(file)
+
+            self.submissions[course_id] = []
+            for index in range(options.assignments_per_course):
+                attachments = [self.make_file(next(next_id), f'submission_{index + 1}.pdf', options.file_size, updated_at)]
+                self.submissions[course_id].append({
+                    'id': next(next_id), 'assignment_id': next(next_id), 'user_id': 1,
+                    'workflow_state': 'submitted', 'attachments': attachments
+                })
+
+    def make_file(self, file_id, name, size, updated_at):
+        file = {
+            'id': file_id, 'display_name': name, 'filename': name, 'size': size,
+            'content-type': 'application/octet-stream', 'updated_at': updated_at,
+            'uuid': uuid.uuid5(uuid.NAMESPACE_OID, str(file_id)).hex
+        }
+        self.files[file_id] = file
+        return file
+
+    def set_base_url(self, base_url):
+        self.base_url = base_url
+        for file in self.files.values():
+            file['url'] = f"{base_url}/files/{file['id']}/download?verifier=benchmark"
+
+
+class RateLimitBucket:
+    """Canvas-style leaky bucket driving X-Rate-Limit-Remaining"""
+
+    def __init__(self, capacity, cost, refill):
+        self.capacity = capacity
+        self.cost = cost
+        self.refill = refill
+        self.remaining = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def charge(self):
+        """Charge one request; returns the remaining bucket, negative when the request is rejected"""
+        with self.lock:
+            now = time.monotonic()
+            self.remaining = min(self.capacity, self.remaining + (now - self.updated) * self.refill)
+            self.updated = now
+            if self.remaining < self.cost:
+                return -1
+            self.remaining -= self.cost
+            return self.remaining
+
+
+class MockCanvasHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    canvas = None
+    options = None
+    bucket = None
+    stats = None
+    stats_lock = threading.Lock()
+
+    ROUTES = [
+        (re.compile(r'^/api/v1/users/self$'), 'user'),
+        (re.compile(r'^/api/v1/(?:users/[^/]+/)?courses$'), 'courses'),
+        (re.compile(r'^/api/v1/courses/(\d+)/folders$'), 'folders'),
+        (re.compile(r'^/api/v1/courses/(\d+)/files$'), 'course_files'),
+        (re.compile(r'^/api/v1/folders/(\d+)/files$'), 'folder_files'),
+        (re.compile(r'^/api/v1/courses/(\d+)/students/submissions$'), 'submissions'),
+        (re.compile(r'^/api/v1/courses/(\d+)/assignments$'), 'assignments'),
+    ]
+
+    def log_message(self, format, *args):
+        pass
+
+    def count(self, key, amount=1):
+        with self.stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            with self.stats_lock:
+                return self.send_json(200, self.stats)
+        if parsed.path.startswith('/files/'):
+            return self.serve_file(parsed)
+        for pattern, name in self.ROUTES:
+            match = pattern.match(parsed.path)
+            if match:
+                return self.serve_api(name, match.groups(), parsed)
+        self.send_json(404, {'errors': [{'message': 'The specified resource does not exist.'}]})
+
+    def do_HEAD(self):
+        """Size/range probe used by segmented downloads: file headers without the body"""
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/files/'):
+            return self.serve_file(parsed, head=True)
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def serve_api(self, name, args, parsed):
+        self.count('api_calls')
+        self.count(f'api:{name}')
+        if self.options.api_latency:
+            time.sleep(self.options.api_latency)
+
+        headers = {}
+        if self.bucket is not None:
+            remaining = self.bucket.charge()
+            if remaining < 0:
+                self.count('rate_limited')
+                payload = b'403 Forbidden (Rate Limit Exceeded)'
+                self.send_response(403)
+                self.send_header('X-Rate-Limit-Remaining', '0')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+            headers['X-Rate-Limit-Remaining'] = f'{remaining:.1f}'
+
+        canvas = self.canvas
+        key = int(args[0]) if args else None
+        if name == 'user':
+            return self.send_json(200, {'id': 1, 'name': 'Benchmark User'}, headers)
+        items = {
+            'courses': lambda: canvas.courses,
+            'folders': lambda: canvas.folders.get(key),
+            'course_files': lambda: canvas.course_files.get(key),
+            'folder_files': lambda: canvas.folder_files.get(key),
+            'submissions': lambda: canvas.submissions.get(key),
+            'assignments': lambda: [{'id': s['assignment_id'], 'name': f"Assignment {s['assignment_id']}"}
+                                    for s in canvas.submissions.get(key, [])],
+        }[name]()
+        if items is None:
+            return self.send_json(404, {'errors': [{'message': 'The specified resource does not exist.'}]}, headers)
+        self.send_page(items, parsed, headers)
+
+    def send_page(self, items, parsed, headers):
+        """Numbered pagination with first/next/last Link headers, like Canvas"""
+        query = [(k, v) for k, v in parse_qsl(parsed.query) if k != 'page']
+        params = dict(query)
+        per_page = max(1, min(int(params.get('per_page', 10)), 100))
+        page = max(1, int(dict(parse_qsl(parsed.query)).get('page', 1)))
+        last = max(1, math.ceil(len(items) / per_page))
+
+        def link(number):
+            return f"{self.canvas.base_url}{parsed.path}?{urlencode(query + [('page', number)])}"
+
+        links = [f'<{link(1)}>; rel="first"', f'<{link(last)}>; rel="last"']
+        if page < last:
+            links.append(f'<{link(page + 1)}>; rel="next"')
+        headers['Link'] = ', '.join(links)
+        self.send_json(200, items[(page - 1) * per_page:page * per_page], headers)
+
+    def serve_file(self, parsed, head=False):
+        match = re.match(r'^/files/(\d+)/download$', parsed.path)
+        file = self.canvas.files.get(int(match.group(1))) if match else None
+        if file is None:
+            if head:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                return self.end_headers()
+            return self.send_json(404, {'errors': [{'message': 'Not Found'}]})
+
+        self.count('head_requests' if head else 'file_requests')
+        if self.options.file_latency:
+            time.sleep(self.options.file_latency)
+
+        size = file['size']
+        etag = f'"{file["uuid"]}"'
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == etag):
+            range_match = re.match(r'bytes=(\d+)-(\d*)', range_header)
+            if range_match:
+                start = int(range_match.group(1))
+                end = min(int(range_match.group(2)), size - 1) if range_match.group(2) else size - 1
+                if start >= size:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                status = 206
+                self.count('range_requests')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        if head:
+            return
+
+        with self.stats_lock:
+            self.stats.setdefault('first_file_byte_at', time.time())
+        chunk_size = 64 * 1024
+        offset = start
+        while offset <= end:
+            length = min(chunk_size, end - offset + 1)
+            block_offset = offset % len(BLOCK)
+            chunk = (BLOCK[block_offset:] + BLOCK)[:length]
+            self.wfile.write(chunk)
+            offset += length
+            if self.options.bandwidth:
+                time.sleep(length / self.options.bandwidth)
+        self.count('bytes_served', end - start + 1)
+
+
+def run_mock_server(options, ready):
+    """Child process entry point: serve the mock Canvas API until terminated"""
+    canvas = MockCanvas(options)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockCanvasHandler)
+    server.daemon_threads = True
+    canvas.set_base_url(f'http://127.0.0.1:{server.server_port}')
+
+    MockCanvasHandler.canvas = canvas
+    MockCanvasHandler.options = options
+    MockCanvasHandler.stats = {}
+    if options.rate_limit_capacity:
+        MockCanvasHandler.bucket = RateLimitBucket(
+            options.rate_limit_capacity, options.rate_limit_cost, options.rate_limit_refill
+        )
+
+    ready.put((canvas.base_url, [course['id'] for course in canvas.courses]))
+    server.serve_forever()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+
+
+def run_benchmark(options):
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=run_mock_server, args=(options, ready), daemon=True)
+    server.start()
+    work_dir = tempfile.mkdtemp(prefix='canvas-bench-')
+    try:
+        base_url, course_ids = ready.get(timeout=30)
+
+        # Configure the app for an isolated run before importing it
+        os.environ['JOB_STORE_PATH'] = os.path.join(work_dir, 'jobs.sqlite3')
+        os.environ.setdefault('FILES_PER_HOUR', str(10 ** 9))
+        os.environ.setdefault('FILES_PER_DAY', str(10 ** 9))
+        os.environ.setdefault('COURSES_PER_HOUR', str(10 ** 9))
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        if not options.verbose:
+            import logging
+            logging.disable(logging.INFO)
+        import app
+        import requests
+
+        if options.backend == 'async' and app.aiohttp is None:
+            raise SystemExit('The async backend requires the aiohttp package')
+        manager_class = app.AsyncDownloadManager if options.backend == 'async' else app.DownloadManager
+        output_root = options.output_dir or os.path.join(work_dir, 'downloads')
+        baseline_rss = peak_rss_mb()
+
+        managers = []
+        for index in range(options.jobs):
+            manager = manager_class(
+                str(uuid.uuid4()), base_url, 'benchmark-token', os.path.join(output_root, f'job-{index + 1}'),
+                course_ids, f'benchmark-{index + 1}', '127.0.0.1', max_workers=options.workers, dedup=options.dedup,
+                schedule=options.schedule
+            )
+            app.active_downloads[manager.download_id] = manager
+            app.job_store.create_job(manager)
+            managers.append(manager)
+
+        started = time.time()
+        if options.backend == 'async':
+            futures = [app.async_loop.submit(manager.run_download_async()) for manager in managers]
+            for future in futures:
+                future.result()
+        else:
+            threads = [threading.Thread(target=manager.run_download) for manager in managers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finished = time.time()
+
+        stats = requests.get(f'{base_url}/__stats', timeout=10).json()
+        downloaded = sum(sum(s['files'] for s in m.worker_stats.values()) for m in managers)
+        processed = sum(m.progress['current'] for m in managers)
+        num_bytes = sum(m.bytes_downloaded for m in managers)
+        download_started = min((m.download_started for m in managers if m.download_started), default=finished)
+        wall = finished - started
+        downloading = max(finished - download_started, 1e-9)
+        first_byte = stats.get('first_file_byte_at')
+
+        return {
+            'schema_version': SCHEMA_VERSION,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scenario': {key: value for key, value in vars(options).items() if key not in ('output', 'verbose')},
+            'results': {
+                'statuses': [m.status for m in managers],
+                'files_processed': processed,
+                'files_downloaded': downloaded,
+                'files_skipped': sum(m.skipped_files for m in managers),
+                'bytes_downloaded': num_bytes,
+                'wall_seconds': round(wall, 3),
+                'download_phase_seconds': round(downloading, 3),
+                'files_per_sec': round(downloaded / wall, 2) if wall else 0,
+                'mb_per_sec': round(num_bytes / 1024 / 1024 / downloading, 2),
+                'api_calls': stats.get('api_calls', 0),
+                'api_calls_by_endpoint': {key[4:]: value for key, value in stats.items() if key.startswith('api:')},
+                'api_calls_per_file': round(stats.get('api_calls', 0) / processed, 3) if processed else None,
+                'file_requests': stats.get('file_requests', 0),
+                'range_requests': stats.get('range_requests', 0),
+                'head_requests': stats.get('head_requests', 0),
+                'rate_limited_responses': stats.get('rate_limited', 0),
+                'time_to_first_byte_seconds': round(first_byte - started, 3) if first_byte else None,
+                'baseline_rss_mb': baseline_rss,
+                'peak_rss_mb': peak_rss_mb(),
+            }
+        }
+    finally:
+        server.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Canvas downloads against a local mock Canvas server')
+    parser.add_argument('--backend', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--jobs', type=int, default=1, help='concurrent download jobs')
+    parser.add_argument('--workers', type=int, default=4, help='maxWorkers per job (threads backend)')
+    parser.add_argument('--dedup', action='store_true')
+    parser.add_argument('--schedule', choices=['listing', 'smallest_first', 'largest_first'], default='listing',
+                        help='order of queued downloads')
+    parser.add_argument('--courses', type=int, default=3)
+    parser.add_argument('--folders-per-course', type=int, default=5)
+    parser.add_argument('--files-per-course', type=int, default=100)
+    parser.add_argument('--assignments-per-course', type=int, default=20)
+    parser.add_argument('--file-size', type=int, default=256 * 1024, help='bytes per regular file')
+    parser.add_argument('--large-files-per-course', type=int, default=0)
+    parser.add_argument('--large-file-size', type=int, default=150 * 1024 * 1024)
+    parser.add_argument('--api-latency', type=float, default=0.05, help='seconds added to every API response')
+    parser.add_argument('--file-latency', type=float, default=0.02, help='seconds before a file body starts')
+    parser.add_argument('--bandwidth', type=float, default=0, help='bytes/sec per file response (0 = unlimited)')
+    parser.add_argument('--rate-limit-capacity', type=float, default=700, help='0 disables rate-limit headers')
+    parser.add_argument('--rate-limit-cost', type=float, default=1)
+    parser.add_argument('--rate-limit-refill', type=float, default=50, help='bucket units restored per second')
+    parser.add_argument('--output-dir', help='download here instead of a temp dir (kept, so reruns measure incremental sync)')
+    parser.add_argument('--output', help='write the JSON result to this file instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help='keep the app INFO logs')
+    options = parser.parse_args(argv)
+    options.folders_per_course = max(1, options.folders_per_course)
+    return options
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    document = json.dumps(run_benchmark(options), indent=2)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            f.write(document + '\n')
+    else:
+        print(document)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# app.py reads its configuration when imported: keep the test job store out of the working tree
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server'))
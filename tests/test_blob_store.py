@@ -0,0 +1,53 @@
+import hashlib
+import os
+from types import SimpleNamespace
+
+from app import BlobStore
+
+DATA = b'lecture slides'
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def downloaded(path, data=DATA):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_duplicate_content_is_linked_to_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path))
+    first = downloaded(tmp_path / 'first.pdf')
+    second = downloaded(tmp_path / 'second.pdf')
+
+    assert not store.ingest(SimpleNamespace(uuid='a'), first, SHA256)
+    assert store.ingest(SimpleNamespace(uuid='b'), second, SHA256)
+    blob = store.blob_path(SHA256)
+    assert os.path.samefile(first, blob) and os.path.samefile(second, blob)
+
+
+def test_lookup_uses_persisted_index(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.ingest(SimpleNamespace(uuid='a', md5='m'), downloaded(tmp_path / 'first.pdf'), SHA256)
+
+    reloaded = BlobStore(str(tmp_path))
+    assert reloaded.lookup(SimpleNamespace(uuid='a', size=len(DATA))) == (store.blob_path(SHA256), SHA256)
+    assert reloaded.lookup(SimpleNamespace(uuid='other', md5='m'))[1] == SHA256
+    assert reloaded.lookup(SimpleNamespace(uuid='other')) == (None, None)
+
+
+def test_lookup_ignores_blob_with_wrong_size(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.ingest(SimpleNamespace(uuid='a'), downloaded(tmp_path / 'first.pdf'), SHA256)
+
+    assert store.lookup(SimpleNamespace(uuid='a', size=len(DATA) + 1)) == (None, None)
+
+
+def test_link_into_replaces_existing_file(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.ingest(SimpleNamespace(uuid='a'), downloaded(tmp_path / 'first.pdf'), SHA256)
+    dest = downloaded(tmp_path / 'stale.pdf', b'old')
+
+    store.link_into(store.blob_path(SHA256), dest)
+    with open(dest, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(dest + '.link')
@@ -0,0 +1,44 @@
+import app
+from app import EventBatcher
+
+
+def make_batcher(monkeypatch, **kwargs):
+    emitted = []
+    monkeypatch.setattr(app.socketio, 'emit', lambda event, data, room=None: emitted.append((event, data, room)))
+    return EventBatcher('socket', lambda: {'downloaded': 1}, **kwargs), emitted
+
+
+def test_flush_sends_one_progress_and_one_log_batch(monkeypatch):
+    batcher, emitted = make_batcher(monkeypatch)
+    batcher.add_progress()
+    batcher.add_progress()
+    batcher.add_log({'message': 'a'})
+    batcher.add_log({'message': 'b'})
+    batcher.flush()
+
+    assert emitted == [
+        ('download_log_batch', {'entries': [{'message': 'a'}, {'message': 'b'}]}, 'socket'),
+        ('download_progress', {'downloaded': 1}, 'socket')
+    ]
+    batcher.flush()
+    assert len(emitted) == 2  # Nothing new to send
+
+
+def test_full_batch_flushes_early(monkeypatch):
+    batcher, emitted = make_batcher(monkeypatch, batch_size=2)
+    batcher.add_log({'message': 'a'})
+    assert emitted == []
+    batcher.add_log({'message': 'b'})
+    assert [event for event, _, _ in emitted] == ['download_log_batch']
+
+
+def test_close_delivers_pending_events(monkeypatch):
+    batcher, emitted = make_batcher(monkeypatch, interval=60)
+    batcher.start()
+    batcher.add_log({'message': 'a'})
+    batcher.add_progress()
+    batcher.close()
+    batcher.thread.join(timeout=5)
+
+    assert not batcher.thread.is_alive()
+    assert [event for event, _, _ in emitted] == ['download_log_batch', 'download_progress']
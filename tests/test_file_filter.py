@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import FileFilter
+
+
+def canvas_file(**attributes):
+    defaults = {'id': 1, 'filename': 'notes.pdf', 'content-type': 'application/pdf', 'size': 1000,
+                'updated_at': '2024-02-01T12:00:00Z'}
+    return SimpleNamespace(**dict(defaults, **attributes))
+
+
+def test_no_filters_match_everything():
+    file_filter = FileFilter.from_options(None)
+
+    assert not file_filter.active
+    assert file_filter.matches(canvas_file(), 'Lectures')
+
+
+def test_extensions_and_content_types_form_one_allow_list():
+    file_filter = FileFilter.from_options({'extensions': ['.PDF'], 'contentTypes': ['video/*']})
+
+    assert file_filter.matches(canvas_file(), 'Lectures')
+    assert file_filter.matches(canvas_file(filename='talk.mov', **{'content-type': 'video/quicktime'}), 'Lectures')
+    assert not file_filter.matches(canvas_file(filename='notes.docx', **{'content-type': 'application/msword'}), 'Lectures')
+
+
+def test_max_size_keeps_files_of_unknown_size():
+    file_filter = FileFilter.from_options({'maxSize': 1000})
+
+    assert file_filter.matches(canvas_file(size=1000), 'Lectures')
+    assert not file_filter.matches(canvas_file(size=1001), 'Lectures')
+    assert file_filter.matches(canvas_file(size=None), 'Lectures')
+
+
+def test_folder_globs():
+    file_filter = FileFilter.from_options({'folders': ['Lec*', 'assignments']})
+
+    assert file_filter.matches(canvas_file(), 'Lectures')
+    assert file_filter.matches(canvas_file(), 'assignments')
+    assert not file_filter.matches(canvas_file(), 'Readings')
+
+
+def test_modified_after():
+    file_filter = FileFilter.from_options({'modifiedAfter': '2024-02-01'})
+
+    assert file_filter.matches(canvas_file(updated_at='2024-02-01T00:00:01Z'), 'Lectures')
+    assert not file_filter.matches(canvas_file(updated_at='2024-01-31T23:59:59Z'), 'Lectures')
+    assert file_filter.matches(canvas_file(updated_at=None), 'Lectures')
+
+
+def test_options_round_trip():
+    options = {'extensions': ['pdf'], 'maxSize': 10, 'folders': ['Lectures'], 'modifiedAfter': '2024-02-01'}
+
+    assert FileFilter.from_options(options).options() == options
+
+
+def test_comma_separated_strings_are_lists():
+    assert FileFilter.from_options({'extensions': 'pdf, .pptx'}).extensions == {'pdf', 'pptx'}
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'maxSize': -1}, 'maxSize'),
+    ({'maxSize': True}, 'maxSize'),
+    ({'modifiedAfter': 'last week'}, 'modifiedAfter'),
+    ({'folders': [1]}, 'folders'),
+    (['pdf'], 'object'),
+])
+def test_invalid_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        FileFilter.from_options(options)
+
+
+def test_folder_globs_match_the_flat_folder_name():
+    file_filter = FileFilter.from_options({'folders': ['Week *']})
+
+    assert file_filter.matches(canvas_file(), 'Week 1')
+    assert not file_filter.matches(canvas_file(), 'Readings')
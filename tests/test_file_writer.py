@@ -0,0 +1,58 @@
+import os
+
+from app import FileWriter
+
+COURSE = os.path.join('downloads', 'Fall-2024', 'CS101', 'Lectures')
+
+
+def test_lowest_id_keeps_the_bare_name_whatever_the_listing_order():
+    for order in ([7, 3, 5], [3, 5, 7], [5, 7, 3]):
+        writer = FileWriter()
+        for file_id in order:
+            writer.claim(COURSE, file_id, 'notes.pdf')
+
+        assert [writer.claim(COURSE, file_id, 'notes.pdf') for file_id in (3, 5, 7)] == [
+            'notes.pdf', 'notes (5).pdf', 'notes (7).pdf'
+        ]
+
+
+def test_names_collide_after_sanitizing():
+    writer = FileWriter()
+    writer.claim(COURSE, 9, 'a:b.pdf')
+
+    assert writer.claim(COURSE, 4, 'ab.pdf') == 'ab.pdf'
+    assert writer.claim(COURSE, 9, 'a:b.pdf') == 'ab (9).pdf'
+
+
+def test_settled_name_is_not_taken_back():
+    writer = FileWriter()
+    assert writer.claim(COURSE, 9, 'notes.pdf', settle=True) == 'notes.pdf'
+
+    assert writer.claim(COURSE, 4, 'notes.pdf') == 'notes (4).pdf'
+    assert writer.claim(COURSE, 9, 'notes.pdf') == 'notes.pdf'
+
+
+def test_paths_from_earlier_syncs_keep_their_names():
+    writer = FileWriter(known_paths={os.path.join(COURSE, 'notes.pdf'): 9})
+
+    assert writer.claim(COURSE, 4, 'notes.pdf') == 'notes (4).pdf'
+    assert writer.claim(COURSE, 9, 'notes.pdf') == 'notes.pdf'
+
+
+def test_same_name_in_other_directories_does_not_collide():
+    writer = FileWriter()
+
+    assert writer.claim(COURSE, 1, 'notes.pdf') == 'notes.pdf'
+    assert writer.claim(os.path.join(COURSE, '..', 'Labs'), 2, 'notes.pdf') == 'notes.pdf'
+
+
+def test_preallocation_only_above_threshold(tmp_path):
+    writer = FileWriter(preallocate=True, preallocate_min_size=1000)
+    small = writer.open_temp(str(tmp_path / 'small.bin'), 999)
+    large = writer.open_temp(str(tmp_path / 'large.bin'), 1000)
+    small.close()
+    large.close()
+
+    assert os.path.getsize(tmp_path / 'small.bin.tmp') == 0
+    if writer.preallocate_files:
+        assert os.path.getsize(tmp_path / 'large.bin.tmp') == 1000
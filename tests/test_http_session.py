@@ -0,0 +1,27 @@
+from concurrent.futures import Future
+
+from app import close_when_done
+
+
+class Session:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_session_closes_after_last_future():
+    session = Session()
+    futures = [Future(), Future()]
+    close_when_done(session, futures)
+
+    futures[0].set_result(None)
+    assert not session.closed
+    futures[1].set_exception(RuntimeError('count failed'))
+    assert session.closed
+
+
+def test_session_without_futures_closes_at_once():
+    session = Session()
+    close_when_done(session, [])
+    assert session.closed
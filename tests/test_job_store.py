@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import app
+from app import JobStore
+
+from test_rate_limits import Clock
+
+
+def make_manager(job_id='job'):
+    return SimpleNamespace(
+        download_id=job_id, api_url='https://canvas.example', account=('https://canvas.example', 'hash'),
+        output_path='/tmp/out', selected_courses=[1, 2], client_ip='127.0.0.1', status='initializing',
+        job_options=lambda: {'max_workers': 4}
+    )
+
+
+def test_job_round_trips_with_progress(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create_job(make_manager())
+    store.update_job('job', 'downloading', {'downloaded': 3}, [{'message': 'hi'}], stats={'files': 3})
+    store.update_job('job', 'completed', {'downloaded': 5}, [])
+
+    job = store.get_job('job')
+    assert job['status'] == 'completed'
+    assert job['selected_courses'] == [1, 2]
+    assert job['options'] == {'max_workers': 4}
+    assert job['progress'] == {'downloaded': 5}
+    assert job['stats'] == {'files': 3}  # Kept when a heartbeat has no stats
+    assert store.get_job('missing') is None
+
+
+def test_completed_file_ids_for_resume(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create_job(make_manager())
+    store.record_files('job', [(1, 'a.pdf', 'downloaded'), (2, 'b.pdf', 'failed'), (3, 'c.pdf', 'skipped')])
+    store.record_files('job', [(2, 'b.pdf', 'downloaded')])
+
+    assert store.completed_file_ids('job') == {1, 2, 3}
+    assert JobStore(store.path).completed_file_ids('job') == {1, 2, 3}  # Visible to another process
+
+
+def test_silent_active_job_reads_as_interrupted(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'time', clock)
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create_job(make_manager())
+    store.update_job('job', 'downloading', {}, [])
+
+    assert store.get_job('job')['status'] == 'downloading'
+    clock.now += app.JOB_STALE_SECONDS + 1
+    assert store.get_job('job')['status'] == 'interrupted'
+
+
+def test_stop_request_is_reported_by_heartbeat(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.create_job(make_manager())
+
+    assert not store.update_job('job', 'downloading', {}, [])
+    assert store.request_stop('job')
+    assert store.update_job('job', 'downloading', {}, [])
+    store.clear_stop('job')
+    assert not store.update_job('job', 'downloading', {}, [])
+    assert not store.request_stop('missing')
@@ -0,0 +1,45 @@
+from app import LogBuffer
+
+
+def filled(capacity, count):
+    buffer = LogBuffer(capacity)
+    for index in range(count):
+        buffer.append({'message': f'line {index + 1}'})
+    return buffer
+
+
+def test_since_pages_after_cursor():
+    buffer = filled(10, 5)
+
+    entries, cursor, missed = buffer.since(0, 2)
+    assert [entry['seq'] for entry in entries] == [1, 2]
+    assert (cursor, missed) == (2, 0)
+
+    entries, cursor, missed = buffer.since(cursor, 10)
+    assert [entry['seq'] for entry in entries] == [3, 4, 5]
+    assert (cursor, missed) == (5, 0)
+
+
+def test_since_at_the_end_keeps_cursor():
+    buffer = filled(10, 3)
+
+    assert buffer.since(3, 10) == ([], 3, 0)
+
+
+def test_since_on_empty_buffer():
+    assert LogBuffer(10).since(0, 10) == ([], 0, 0)
+
+
+def test_since_reports_evicted_entries():
+    buffer = filled(3, 7)  # Entries 1-4 have been evicted
+
+    entries, cursor, missed = buffer.since(2, 10)
+    assert [entry['seq'] for entry in entries] == [5, 6, 7]
+    assert (cursor, missed) == (7, 2)
+
+
+def test_tail_returns_latest_entries():
+    buffer = filled(5, 8)
+
+    assert [entry['seq'] for entry in buffer.tail(2)] == [7, 8]
+    assert [entry['seq'] for entry in buffer.tail(50)] == [4, 5, 6, 7, 8]
@@ -0,0 +1,55 @@
+import app
+from app import MetadataCache
+
+from test_rate_limits import Clock
+
+ACCOUNT = MetadataCache.account_key('https://canvas.example/', 'token')
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'time', clock)
+    return MetadataCache(**kwargs), clock
+
+
+def test_account_key_hides_token():
+    assert ACCOUNT[0] == 'https://canvas.example'
+    assert 'token' not in ACCOUNT[1]
+    assert MetadataCache.account_key('https://canvas.example', 'other') != ACCOUNT
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch, ttl=60)
+    cache.put(ACCOUNT, 'courses', 'all', ['math'])
+
+    clock.now += 59
+    assert cache.get(ACCOUNT, 'courses', 'all') == ['math']
+    clock.now += 2
+    assert cache.get(ACCOUNT, 'courses', 'all') is None
+    assert cache.stats()['entries'] == 0
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=2)
+    cache.put(ACCOUNT, 'folders', 1, 'one')
+    cache.put(ACCOUNT, 'folders', 2, 'two')
+    cache.get(ACCOUNT, 'folders', 1)  # 2 is now the oldest
+    cache.put(ACCOUNT, 'folders', 3, 'three')
+
+    assert cache.get(ACCOUNT, 'folders', 1) == 'one'
+    assert cache.get(ACCOUNT, 'folders', 2) is None
+    assert cache.get(ACCOUNT, 'folders', 3) == 'three'
+
+
+def test_get_or_load_only_loads_on_miss(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'id': 7}
+
+    assert cache.get_or_load(ACCOUNT, 'user', None, loader) == {'id': 7}
+    assert cache.get_or_load(ACCOUNT, 'user', None, loader) == {'id': 7}
+    assert len(calls) == 1
@@ -0,0 +1,73 @@
+import app
+from app import TokenBucketLimiter
+
+LIMITS = [('hour', 10, 3600), ('day', 20, 86400)]
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'time', clock)
+    return TokenBucketLimiter(LIMITS), clock
+
+
+def test_reserve_is_all_or_nothing(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch)
+
+    assert limiter.reserve('client', 8) == (8, 'hour', 10)
+    assert limiter.reserve('client', 5) == (0, 'hour', 2)
+    assert limiter.reserve('client', 2) == (2, 'hour', 2)
+
+
+def test_partial_reserve_grants_what_is_left(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch)
+    limiter.reserve('client', 8)
+
+    assert limiter.reserve('client', 5, partial=True) == (2, 'hour', 2)
+    assert limiter.reserve('client', 1, partial=True)[0] == 0
+
+
+def test_clients_have_separate_buckets(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch)
+    limiter.reserve('first', 10)
+
+    assert limiter.reserve('second', 10)[0] == 10
+
+
+def test_release_returns_tokens_up_to_capacity(monkeypatch):
+    limiter, _ = make_limiter(monkeypatch)
+    limiter.reserve('client', 6)
+    limiter.release('client', 4)
+
+    assert limiter.reserve('client', 8)[0] == 8
+
+    limiter.release('client', 100)
+    assert limiter.reserve('client', 11)[0] == 0  # The hour bucket never exceeds its capacity
+
+
+def test_buckets_refill_over_time(monkeypatch):
+    limiter, clock = make_limiter(monkeypatch)
+    limiter.reserve('client', 10)
+
+    clock.now += 360  # A tenth of the hour refills one token
+    assert limiter.reserve('client', 2) == (0, 'hour', 1)
+    assert limiter.reserve('client', 1)[0] == 1
+
+
+def test_slowest_bucket_limits(monkeypatch):
+    limiter, clock = make_limiter(monkeypatch)
+    limiter.reserve('client', 10)
+    clock.now += 3600
+    limiter.reserve('client', 10)
+    clock.now += 3600
+
+    granted, limiting, available = limiter.reserve('client', 5)
+    assert (granted, limiting) == (0, 'day')
+    assert available < 5
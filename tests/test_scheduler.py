@@ -0,0 +1,133 @@
+import math
+import threading
+
+from app import DownloadScheduler
+
+
+def make_scheduler(per_host=16):
+    # No worker threads: tests pick tasks with _next_task to check the order deterministically
+    return DownloadScheduler(workers=0, per_host=per_host)
+
+
+def pick(scheduler):
+    with scheduler.condition:
+        picked = scheduler._next_task()
+    if picked is None:
+        return None
+    _, (_, _, args) = picked
+    return args[0]
+
+
+def finish(scheduler, job_id):
+    with scheduler.condition:
+        job = scheduler.jobs[job_id]
+        job['running'] -= 1
+        scheduler.host_running[job['host']] -= 1
+
+
+def test_jobs_are_picked_round_robin():
+    scheduler = make_scheduler()
+    scheduler.register_job('a', 'canvas.example', 10)
+    scheduler.register_job('b', 'canvas.example', 10)
+    for index in range(3):
+        scheduler.submit('a', print, f'a{index}')
+        scheduler.submit('b', print, f'b{index}')
+
+    assert [pick(scheduler) for _ in range(6)] == ['a0', 'b0', 'a1', 'b1', 'a2', 'b2']
+    assert pick(scheduler) is None
+
+
+def test_job_limit_caps_running_tasks():
+    scheduler = make_scheduler()
+    scheduler.register_job('a', 'canvas.example', 1)
+    scheduler.submit('a', print, 'first')
+    scheduler.submit('a', print, 'second')
+
+    assert pick(scheduler) == 'first'
+    assert pick(scheduler) is None
+    finish(scheduler, 'a')
+    assert pick(scheduler) == 'second'
+
+
+def test_set_job_limit_raises_cap():
+    scheduler = make_scheduler()
+    scheduler.register_job('a', 'canvas.example', 1)
+    scheduler.submit('a', print, 'first')
+    scheduler.submit('a', print, 'second')
+
+    assert pick(scheduler) == 'first'
+    scheduler.set_job_limit('a', 2)
+    assert pick(scheduler) == 'second'
+
+
+def test_per_host_cap_spans_jobs():
+    scheduler = make_scheduler(per_host=1)
+    scheduler.register_job('a', 'canvas.example', 10)
+    scheduler.register_job('b', 'canvas.example', 10)
+    scheduler.register_job('c', 'other.example', 10)
+    for job_id in ('a', 'b', 'c'):
+        scheduler.submit(job_id, print, job_id)
+
+    assert pick(scheduler) == 'a'
+    assert pick(scheduler) == 'c'  # b shares a's host, which is at its cap
+    assert pick(scheduler) is None
+    finish(scheduler, 'a')
+    assert pick(scheduler) == 'b'
+
+
+def test_priority_orders_a_jobs_queue():
+    scheduler = make_scheduler()
+    scheduler.register_job('a', 'canvas.example', 10)
+    for priority in (5, 1, math.inf, 1, -3):
+        scheduler.submit('a', print, priority, priority=priority)
+
+    assert [pick(scheduler) for _ in range(5)] == [-3, 1, 1, 5, math.inf]
+
+
+def test_unregister_cancels_queued_tasks():
+    scheduler = make_scheduler()
+    scheduler.register_job('a', 'canvas.example', 1)
+    running = scheduler.submit('a', print, 'running')
+    queued = scheduler.submit('a', print, 'queued')
+    assert pick(scheduler) == 'running'
+
+    scheduler.unregister_job('a')
+
+    assert queued.cancelled()
+    assert not running.cancelled()
+    assert 'a' not in scheduler.stats()['jobs']
+
+
+def test_workers_run_tasks_and_report_errors():
+    scheduler = DownloadScheduler(workers=2, per_host=2)
+    scheduler.register_job('a', 'canvas.example', 2)
+    results = [scheduler.submit('a', lambda value: value * 2, value) for value in range(5)]
+    failed = scheduler.submit('a', lambda: 1 / 0)
+
+    assert [future.result(timeout=5) for future in results] == [0, 2, 4, 6, 8]
+    assert isinstance(failed.exception(timeout=5), ZeroDivisionError)
+    scheduler.unregister_job('a')
+
+
+def test_workers_respect_job_limit():
+    scheduler = DownloadScheduler(workers=4, per_host=4)
+    scheduler.register_job('a', 'canvas.example', 2)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+    release = threading.Event()
+
+    def task():
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        release.wait(5)
+        with lock:
+            state['running'] -= 1
+
+    futures = [scheduler.submit('a', task) for _ in range(6)]
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+
+    assert state['peak'] <= 2
+    scheduler.unregister_job('a')
@@ -0,0 +1,78 @@
+import os
+from types import SimpleNamespace
+
+from app import SyncManifest
+
+
+def canvas_file(file_id=1, size=5, updated_at='2024-02-01T12:00:00Z'):
+    return SimpleNamespace(id=file_id, size=size, updated_at=updated_at)
+
+
+def write(path, data=b'hello'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_recorded_file_is_current(tmp_path):
+    manifest = SyncManifest(str(tmp_path))
+    path = str(tmp_path / 'course' / 'notes.pdf')
+    write(path)
+    manifest.record(canvas_file(), path)
+
+    assert manifest.is_current(canvas_file(), path)
+    assert not manifest.is_current(canvas_file(updated_at='2024-03-01T00:00:00Z'), path)
+    assert not manifest.is_current(canvas_file(), str(tmp_path / 'course' / 'moved.pdf'))
+
+
+def test_truncated_copy_is_not_current(tmp_path):
+    manifest = SyncManifest(str(tmp_path))
+    path = str(tmp_path / 'notes.pdf')
+    write(path)
+    manifest.record(canvas_file(), path)
+    write(path, b'he')
+
+    assert not manifest.is_current(canvas_file(), path)
+
+
+def test_entries_survive_reload_and_compaction(tmp_path):
+    manifest = SyncManifest(str(tmp_path))
+    path = str(tmp_path / 'notes.pdf')
+    write(path)
+    manifest.record(canvas_file(), path, 'abc')
+    manifest.record(canvas_file(), path, 'def')  # Later lines override earlier ones
+    manifest.compact()
+
+    reloaded = SyncManifest(str(tmp_path))
+    assert reloaded.get(1)['sha256'] == 'def'
+    with open(reloaded.path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    manifest = SyncManifest(str(tmp_path))
+    path = str(tmp_path / 'notes.pdf')
+    write(path)
+    manifest.record(canvas_file(), path)
+    with open(manifest.path, 'a', encoding='utf-8') as f:
+        f.write('{"id": 2, "pa')
+
+    reloaded = SyncManifest(str(tmp_path))
+    assert reloaded.get(1) is not None
+    assert reloaded.get(2) is None
+
+
+def test_truncated_file_without_entry_is_downloaded_again(tmp_path):
+    from app import DownloadManager
+
+    manager = DownloadManager('job', 'https://canvas.example', 'token', str(tmp_path), [], 'socket', '127.0.0.1')
+    complete = str(tmp_path / 'complete.pdf')
+    truncated = str(tmp_path / 'truncated.pdf')
+    write(complete)
+    write(truncated, b'he')
+
+    assert not manager.should_download_file(complete, canvas_file(file_id=1))  # Adopted
+    assert manager.should_download_file(truncated, canvas_file(file_id=2))
+    assert manager.manifest.get(1) is not None
+    assert manager.manifest.get(2) is None
+    manager.session.close()
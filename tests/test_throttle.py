@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import app
+from app import AdaptiveThrottle
+
+from test_rate_limits import Clock
+
+
+def response(remaining):
+    return SimpleNamespace(status_code=200, headers={'X-Rate-Limit-Remaining': str(remaining)})
+
+
+def make_throttle(monkeypatch, max_limit=8):
+    clock = Clock()
+    monkeypatch.setattr(app.time, 'time', clock)
+    changes = []
+    return AdaptiveThrottle(max_limit, on_limit_change=changes.append), clock, changes
+
+
+def test_low_bucket_halves_limit_and_delays(monkeypatch):
+    throttle, _, changes = make_throttle(monkeypatch)
+    assert throttle.delay() == 0
+
+    throttle.observe(response(50))
+    throttle.observe(response(40))
+    assert throttle.limit == 2
+    assert changes == [4, 2]
+    assert throttle.delay() > 0
+
+
+def test_healthy_responses_grow_limit_back(monkeypatch):
+    throttle, _, _ = make_throttle(monkeypatch)
+    throttle.observe(response(50))
+    throttle.observe(response(200))  # Between LOW and HEALTHY: hold
+    assert throttle.limit == 4
+
+    throttle.observe(response(500))
+    assert throttle.limit == 5
+
+
+def test_stale_reading_recovers_over_time(monkeypatch):
+    throttle, clock, changes = make_throttle(monkeypatch)
+    throttle.observe(response(0))
+    assert throttle.limit == 4
+    assert throttle.recover() == 4  # Still low right after the reading
+
+    clock.now += (app.RATE_LIMIT_HEALTHY + 1) / app.RATE_LIMIT_REFILL_RATE
+    assert throttle.delay() == 0
+    assert throttle.recover() == 5
+    assert throttle.recover() == 5  # At most one step per second
+    for _ in range(5):
+        clock.now += 1
+        throttle.recover()
+    assert throttle.limit == 8
+    assert changes[-1] == 8
+
+
+def test_rate_limited_response_drains_bucket(monkeypatch):
+    throttle, _, _ = make_throttle(monkeypatch)
+    throttle.record_throttled()
+
+    assert throttle.limit == 4
+    assert throttle.throttled == 1
+    assert throttle.delay() > 0
+    assert AdaptiveThrottle.is_throttled(SimpleNamespace(status_code=429, text=''))
+    assert AdaptiveThrottle.is_throttled(SimpleNamespace(status_code=403, text='403 Forbidden (Rate Limit Exceeded)'))
+    assert not AdaptiveThrottle.is_throttled(SimpleNamespace(status_code=403, text='Forbidden'))
+
+
+def test_adapter_only_paces_api_requests(monkeypatch):
+    throttle, _, _ = make_throttle(monkeypatch)
+    throttle.observe(response(0))
+    sent = []
+    monkeypatch.setattr(app.HTTPAdapter, 'send', lambda self, request, **kwargs: sent.append(request.url) or response(0))
+    monkeypatch.setattr(throttle, 'delay', lambda: sent.append('delay') or 0)
+    adapter = app.ThrottledAdapter(throttle)
+
+    adapter.send(SimpleNamespace(url='https://files.example/courses/1/files/2/download'))
+    assert sent == ['https://files.example/courses/1/files/2/download']
+    assert throttle.limit == 4  # File responses aren't observed
+
+    adapter.send(SimpleNamespace(url='https://canvas.example/api/v1/courses'))
+    assert sent[1:] == ['delay', 'https://canvas.example/api/v1/courses']
+    assert throttle.limit == 2
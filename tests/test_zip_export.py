@@ -0,0 +1,94 @@
+import io
+import zipfile
+from types import SimpleNamespace
+
+import requests
+from canvasapi.exceptions import Unauthorized
+
+import app
+from app import ZipExportManager, ZipStreamBuffer
+
+
+class FakeResponse:
+    def __init__(self, chunks, fail_after=None, status_code=200):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.fail_after = fail_after
+        self.headers = {'ETag': '"v1"'}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for index, chunk in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError('connection reset')
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def make_manager(monkeypatch, responses):
+    monkeypatch.setattr(app.socketio, 'emit', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app.time, 'sleep', lambda seconds: None)
+    manager = ZipExportManager('export', 'https://canvas.example', 'token', [1], None, '127.0.0.1')
+    manager.download_allowance = 10
+    requests_made = []
+
+    def get(url, headers=None, **kwargs):
+        requests_made.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(manager.session, 'get', get)
+    return manager, requests_made
+
+
+def export(manager, files):
+    output = ZipStreamBuffer()
+    data = b''
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for file in files:
+            data += b''.join(manager.stream_entry(archive, output, file, 'Term/MATH101', 'MATH101', False))
+    data += output.drain()
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def canvas_file(file_id=1, name='notes.pdf', size=11):
+    return SimpleNamespace(id=file_id, display_name=name, url=f'https://files.example/{file_id}', size=size,
+                           updated_at='2024-02-01T12:00:00Z')
+
+
+def test_entries_stream_into_a_valid_archive(monkeypatch):
+    manager, _ = make_manager(monkeypatch, [FakeResponse([b'hello', b' world']), FakeResponse([b'other'])])
+    archive = export(manager, [canvas_file(), canvas_file(file_id=2, size=5)])
+
+    assert archive.read('Term/MATH101/notes.pdf') == b'hello world'
+    assert archive.read('Term/MATH101/notes (2).pdf') == b'other'
+    assert archive.getinfo('Term/MATH101/notes.pdf').date_time == (2024, 2, 1, 12, 0, 0)
+    manager.session.close()
+
+
+def test_dropped_transfer_resumes_with_range(monkeypatch):
+    manager, requests_made = make_manager(
+        monkeypatch, [FakeResponse([b'hello', b' world'], fail_after=1), FakeResponse([b' world'], status_code=206)]
+    )
+    archive = export(manager, [canvas_file()])
+
+    assert archive.read('Term/MATH101/notes.pdf') == b'hello world'
+    assert requests_made[1] == {'Range': 'bytes=5-', 'If-Range': '"v1"'}
+    manager.session.close()
+
+
+def test_prepare_reports_bad_credentials(monkeypatch):
+    manager, _ = make_manager(monkeypatch, [])
+
+    def initialize_canvas():
+        manager.connection_error = Unauthorized('Invalid access token')
+        return False
+
+    monkeypatch.setattr(manager, 'initialize_canvas', initialize_canvas)
+    assert manager.prepare() == ('Invalid Canvas API credentials', 401)